@@ -0,0 +1,456 @@
+"""离线压测：用合成的 Telegram 更新驱动机器人的处理器
+
+Telegram Bot API 和 GitHub API 都由进程内的假实现代替（模拟延迟和限流），
+图谱放在临时目录中，全程不访问网络。对每种消息组合输出
+p50/p95/p99 延迟和每秒处理的消息数，用于发现性能回退。
+
+用法:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --mix text --messages 500 --chats 20
+    python benchmarks/load_test.py --github-latency 0.3 --github-rate 20 --json result.json
+"""
+
+import argparse
+import asyncio
+import configparser
+import hashlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+BOT_TOKEN = "123456:BENCHMARK"
+BOT_ID = 123456
+MIXES = ("text", "media")
+NOTE_PAGES = 10
+BOOKMARK_URLS = [f"https://example.com/articles/{n}" for n in range(20)]
+
+
+def prepare_workdir(path: Path, concurrency: int) -> None:
+    """写入基准测试配置并切换工作目录（配置在导入 settings 时读取）"""
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(ROOT / "config.sample.ini", encoding="utf-8")
+    config.set("Bot", "BotToken", BOT_TOKEN)
+    config.set("Bot", "AuthorizedIds", "1")
+    config.set("Bot", "ConcurrentUpdates", str(concurrency))
+    config.set("GitHub", "Repo", "graph")
+    # settings 使用默认插值读取配置，% 需要转义
+    config.set("Journal", "JournalsFilesFormat", "%%Y_%%m_%%d")
+
+    (path / "config").mkdir(parents=True, exist_ok=True)
+    with open(path / "config" / "config.ini", "w", encoding="utf-8") as f:
+        config.write(f)
+    os.chdir(path)
+
+
+def seed_graph(graph: Path) -> None:
+    """生成测试用的页面"""
+    pages = graph / "pages"
+    (pages / "bench").mkdir(parents=True, exist_ok=True)
+    for n in range(NOTE_PAGES):
+        (pages / "bench" / f"notes{n}.md").write_text(
+            f"title:: bench/notes{n}\n- 笔记页面 {n}\n", encoding="utf-8"
+        )
+
+
+class FakeGitHubRepo:
+    """进程内的假 GitHub 仓库（Contents API + Git Data API）
+
+    PyGithub 是同步库，服务层在线程池中调用它，这里同样用 time.sleep 模拟延迟；
+    每秒请求数超过上限时抛出 RateLimitExceededException。
+    """
+
+    def __init__(self, latency: float, rate_limit: int):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.files: Dict[str, str] = {}
+        self.requests = 0
+        self.rate_limited = 0
+        # 因分支头已移动被拒绝的引用更新
+        self.stale_refs = 0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._head = "0" * 40
+        # 提交 -> 父提交
+        self._parents: Dict[str, str] = {}
+        self._seq = 0
+        # 请求来自线程池中的多个线程
+        self._lock = threading.Lock()
+
+    def reset_counters(self) -> None:
+        self.requests = 0
+        self.rate_limited = 0
+        self.stale_refs = 0
+
+    def _request(self) -> None:
+        """模拟一次 API 请求"""
+        from github import RateLimitExceededException
+
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            if now - self._window_start >= 1:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            limited = self.rate_limit and self._window_count > self.rate_limit
+            if limited:
+                self.rate_limited += 1
+        if limited:
+            raise RateLimitExceededException(
+                403, {"message": "API rate limit exceeded"}, {}
+            )
+        time.sleep(self.latency * random.uniform(0.5, 1.5))
+
+    def _sha(self) -> str:
+        with self._lock:
+            self._seq += 1
+            return f"{self._seq:040x}"
+
+    # ---- Contents API ----
+
+    def get_contents(self, path: str, ref: Optional[str] = None):
+        from github import UnknownObjectException
+
+        self._request()
+        if path not in self.files:
+            raise UnknownObjectException(404, {"message": "Not Found"}, {})
+        return SimpleNamespace(path=path, sha=self.files[path])
+
+    def create_file(self, path: str, message: str, content, branch=None, author=None):
+        self._request()
+        self.files[path] = self._sha()
+
+    def update_file(
+        self, path: str, message: str, content, sha: str, branch=None, author=None
+    ):
+        from github import GithubException
+
+        self._request()
+        if self.files.get(path) != sha:
+            raise GithubException(409, {"message": "sha does not match"}, {})
+        self.files[path] = self._sha()
+
+    # ---- Git Data API ----
+
+    def get_git_ref(self, ref: str):
+        self._request()
+        return SimpleNamespace(
+            object=SimpleNamespace(sha=self._head), edit=self._edit_ref
+        )
+
+    def _edit_ref(self, sha: str) -> None:
+        from github import GithubException
+
+        self._request()
+        with self._lock:
+            # 与 GitHub 一致：不是当前分支头的快进时拒绝
+            if self._parents.get(sha) != self._head:
+                self.stale_refs += 1
+                raise GithubException(
+                    422, {"message": "Update is not a fast forward"}, {}
+                )
+            self._head = sha
+
+    def get_git_commit(self, sha: str):
+        self._request()
+        return SimpleNamespace(sha=sha, tree=SimpleNamespace(sha=sha))
+
+    def create_git_blob(self, content: str, encoding: str):
+        self._request()
+        return SimpleNamespace(sha=self._sha())
+
+    def create_git_tree(self, elements, base_tree=None):
+        self._request()
+        return SimpleNamespace(sha=self._sha())
+
+    def create_git_commit(self, message, tree, parents, author=None, committer=None):
+        self._request()
+        sha = self._sha()
+        self._parents[sha] = parents[0].sha
+        return SimpleNamespace(sha=sha)
+
+
+def make_fake_telegram_request(latency: float, photo_size: int):
+    """创建假的 Telegram Bot API 请求实现"""
+    from telegram.request import BaseRequest
+
+    class FakeTelegramRequest(BaseRequest):
+        """按 Bot API 的返回格式应答，并记录机器人发出的回复"""
+
+        def __init__(self):
+            self.calls: Counter = Counter()
+            self.failures = 0
+            self._message_id = 0
+
+        @property
+        def read_timeout(self) -> Optional[float]:
+            return None
+
+        async def initialize(self) -> None:
+            pass
+
+        async def shutdown(self) -> None:
+            pass
+
+        async def do_request(
+            self, url: str, method: str, request_data=None, **kwargs
+        ) -> Tuple[int, bytes]:
+            await asyncio.sleep(latency)
+
+            # 文件下载
+            if "/file/bot" in url:
+                seed = hashlib.sha256(url.rsplit("/", 1)[-1].encode()).digest()
+                return 200, seed * (photo_size // len(seed))
+
+            endpoint = url.rsplit("/", 1)[-1]
+            params = request_data.parameters if request_data else {}
+            self.calls[endpoint] += 1
+            result = self._result(endpoint, params)
+            return 200, json.dumps({"ok": True, "result": result}).encode()
+
+        def _result(self, endpoint: str, params: dict):
+            if endpoint == "getMe":
+                return {
+                    "id": BOT_ID,
+                    "is_bot": True,
+                    "first_name": "Lupin",
+                    "username": "lupin_benchmark_bot",
+                }
+            if endpoint == "getFile":
+                file_id = params["file_id"]
+                return {
+                    "file_id": file_id,
+                    "file_unique_id": file_id,
+                    "file_size": photo_size,
+                    "file_path": f"photos/{file_id}.jpg",
+                }
+            if endpoint in ("sendMessage", "sendDocument", "editMessageText"):
+                text = str(params.get("text") or params.get("caption") or "")
+                if "失败" in text:
+                    self.failures += 1
+                self._message_id += 1
+                return {
+                    "message_id": self._message_id,
+                    "date": int(time.time()),
+                    "chat": {"id": params.get("chat_id") or 0, "type": "private"},
+                    "text": text,
+                }
+            return True
+
+    return FakeTelegramRequest()
+
+
+def _user(chat_id: int) -> dict:
+    return {"id": chat_id, "is_bot": False, "first_name": "Bench"}
+
+
+def message_update(
+    update_id: int, chat_id: int, text: Optional[str] = None, photo_id: str = ""
+) -> dict:
+    """构建消息更新（文本、命令或图片）"""
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "from": _user(chat_id),
+    }
+    if text is not None:
+        message["text"] = text
+        if text.startswith("/"):
+            command = text.split()[0]
+            message["entities"] = [
+                {"type": "bot_command", "offset": 0, "length": len(command)}
+            ]
+    if photo_id:
+        message["photo"] = [
+            {
+                "file_id": photo_id,
+                "file_unique_id": photo_id,
+                "width": 1280,
+                "height": 960,
+            }
+        ]
+    return {"update_id": update_id, "message": message}
+
+
+def build_updates(mix: str, count: int, chats: int, rng: random.Random) -> List[dict]:
+    """按消息组合生成更新"""
+    updates = []
+    for i in range(count):
+        update_id = i + 1
+        chat_id = 1000 + i % chats
+        roll = rng.random()
+
+        if mix == "text":
+            if roll < 0.55:
+                text = f"基准测试消息 {i} #bench [[bench/notes{i % NOTE_PAGES}]]"
+            elif roll < 0.70:
+                text = f"TODO 任务 {i}"
+            elif roll < 0.85:
+                text = f"收藏 {rng.choice(BOOKMARK_URLS)}"
+            else:
+                text = f">>pages/bench/notes{i % NOTE_PAGES}: 笔记 {i}"
+            updates.append(message_update(update_id, chat_id, text))
+
+        elif mix == "media":
+            # 约三成是重复发送的图片，走去重路径
+            if i and roll < 0.3:
+                photo_id = f"photo-{rng.randrange(i)}"
+            else:
+                photo_id = f"photo-{i}"
+            updates.append(message_update(update_id, chat_id, photo_id=photo_id))
+
+    return updates
+
+
+def percentiles(latencies: List[float]) -> Tuple[float, float, float]:
+    """p50/p95/p99（毫秒）"""
+    if len(latencies) < 2:
+        value = latencies[0] * 1000 if latencies else 0.0
+        return value, value, value
+    q = statistics.quantiles(latencies, n=100, method="inclusive")
+    return q[49] * 1000, q[94] * 1000, q[98] * 1000
+
+
+async def run_mix(application, telegram, github, updates: List[dict]) -> dict:
+    """并发投递一组更新并统计延迟"""
+    from telegram import Update
+
+    latencies: List[float] = []
+    errors_before = telegram.failures + application.bot_data.get("errors", 0)
+    github.reset_counters()
+
+    async def deliver(data: dict) -> None:
+        update = Update.de_json(data, application.bot)
+        started = time.perf_counter()
+        await application.update_processor.process_update(
+            update, application.process_update(update)
+        )
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(deliver(data) for data in updates))
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = percentiles(latencies)
+    errors = telegram.failures + application.bot_data.get("errors", 0)
+    return {
+        "messages": len(updates),
+        "errors": errors - errors_before,
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "msgs_per_sec": round(len(updates) / elapsed, 2) if elapsed else 0.0,
+        "github_requests": github.requests,
+        "github_rate_limited": github.rate_limited,
+        "github_stale_refs": github.stale_refs,
+    }
+
+
+async def main(args: argparse.Namespace) -> Dict[str, dict]:
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="lupin-bench-"))
+    prepare_workdir(workdir, args.concurrency)
+
+    from loguru import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    from telegram.ext import ApplicationBuilder
+    from telegram_logseq.bot.update_processor import ChatLaneUpdateProcessor
+    from telegram_logseq.config.settings import settings
+    from telegram_logseq.main import register_handlers
+    from telegram_logseq.services.container import services
+    from telegram_logseq.utils.web_utils import title_resolver
+
+    seed_graph(workdir / settings.GITHUB_REPO)
+
+    # 书签标题预先写入缓存，避免访问网络
+    title_resolver._ensure_loaded()
+    for n, url in enumerate(BOOKMARK_URLS):
+        title_resolver.cache[title_resolver.normalize_url(url)] = [
+            f"文章 {n}",
+            time.time(),
+        ]
+
+    github = FakeGitHubRepo(args.github_latency, args.github_rate)
+    services.github._repo = github
+
+    telegram = make_fake_telegram_request(args.telegram_latency, args.photo_size)
+    application = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .request(telegram)
+        .get_updates_request(
+            make_fake_telegram_request(args.telegram_latency, args.photo_size)
+        )
+        .concurrent_updates(ChatLaneUpdateProcessor(args.concurrency))
+        .build()
+    )
+    register_handlers(application)
+
+    async def on_error(update: object, context) -> None:
+        context.bot_data["errors"] = context.bot_data.get("errors", 0) + 1
+
+    application.add_error_handler(on_error)
+
+    rng = random.Random(args.seed)
+    results: Dict[str, dict] = {}
+    async with application:
+        for mix in args.mix or MIXES:
+            updates = build_updates(mix, args.messages, args.chats, rng)
+            results[mix] = await run_mix(application, telegram, github, updates)
+
+    print(f"工作目录: {workdir}")
+    print(
+        f"{'mix':<10}{'msgs':>6}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'msgs/s':>10}{'gh reqs':>9}{'gh 429':>8}{'gh 422':>8}"
+    )
+    for mix, r in results.items():
+        print(
+            f"{mix:<10}{r['messages']:>6}{r['errors']:>8}{r['p50_ms']:>10.1f}"
+            f"{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['msgs_per_sec']:>10.1f}"
+            f"{r['github_requests']:>9}{r['github_rate_limited']:>8}"
+            f"{r['github_stale_refs']:>8}"
+        )
+
+    if args.json:
+        output = {"args": {k: v for k, v in vars(args).items() if k != "json"}}
+        output["results"] = results
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="离线压测机器人处理器")
+    parser.add_argument("--mix", choices=MIXES, action="append")
+    parser.add_argument("--messages", type=int, default=200, help="每种组合的消息数")
+    parser.add_argument("--chats", type=int, default=10, help="模拟的聊天数量")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发处理的更新数")
+    parser.add_argument("--telegram-latency", type=float, default=0.03)
+    parser.add_argument("--github-latency", type=float, default=0.15)
+    parser.add_argument(
+        "--github-rate", type=int, default=0, help="每秒 GitHub 请求上限（0 表示不限）"
+    )
+    parser.add_argument("--photo-size", type=int, default=256 * 1024)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="默认使用临时目录")
+    parser.add_argument("--json", default=None, help="把结果写入 JSON 文件")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    if args.json:
+        args.json = str(Path(args.json).resolve())
+    asyncio.run(main(args))
@@ -0,0 +1,274 @@
+"""解析器微基准：在生成的图谱样本上测量各解析函数的耗时和内存峰值
+
+覆盖 FlashcardService._build_flashcard_list、MindmapService.parse_markdown、
+TextUtils.extract_tags / extract_metadata / extract_url / tokenize 以及 Settings 加载。
+样本按固定随机种子生成并缓存在 benchmarks/fixtures/，结果保存在
+benchmarks/results/，每次运行自动与上一次结果（或 --baseline 指定的文件）对比。
+
+用法:
+    python benchmarks/parsers.py
+    python benchmarks/parsers.py --fixture small --fixture deep --repeat 5
+    python benchmarks/parsers.py --baseline benchmarks/results/20240101-120000.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from load_test import prepare_workdir
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+RESULTS_DIR = BENCH_DIR / "results"
+
+# 修改生成逻辑时递增，已缓存的样本会重新生成
+FIXTURE_VERSION = 1
+
+# 名称 -> (页面数, 每页块数, 最大嵌套深度, 是否为日志)
+FIXTURES = {
+    "small": (50, 30, 4, False),
+    "1k": (1000, 30, 4, False),
+    "10k": (10000, 30, 4, False),
+    "deep": (100, 200, 40, False),
+    "long_journal": (3, 20000, 3, True),
+}
+
+TAGS = ("reading", "idea", "project", "book", "paper")
+TYPES = ("book", "article", "person", "project")
+STATUSES = ("reading", "done", "todo")
+
+
+def generate_page(
+    rng: random.Random,
+    index: int,
+    blocks: int,
+    max_depth: int,
+    journal: bool,
+    flashcard_tag: str,
+) -> str:
+    """生成一个 Logseq 页面（属性、标签、引用、链接、任务和闪卡块）"""
+    lines = []
+    if not journal:
+        lines.append(f"title:: 页面 {index}")
+        lines.append(f"type:: {rng.choice(TYPES)}")
+        lines.append(f"status:: {rng.choice(STATUSES)}")
+
+    depth = 0
+    i = 0
+    while i < blocks:
+        # 随机游走的缩进，整体偏向更深的层级
+        depth = max(0, min(max_depth, depth + rng.choice((-1, 0, 1, 1))))
+        indent = "\t" * depth
+        roll = rng.random()
+
+        if roll < 0.05 and depth <= max_depth - 2:
+            lines.append(f"{indent}- 卡组 {i} {flashcard_tag}")
+            for q in range(3):
+                lines.append(f"{indent}\t- 问题 {i}-{q}")
+                ref = rng.randrange(1000)
+                lines.append(f"{indent}\t\t- 答案 {i}-{q} [[页面 {ref}]]")
+            i += 7
+            continue
+
+        if roll < 0.25:
+            n = rng.randrange(10000)
+            url = f"https://example.com/articles/{n}?utm_source=tg"
+            lines.append(f"{indent}- 收藏 [文章 {n}]({url}) #bookmark")
+        elif roll < 0.35:
+            lines.append(f"{indent}  {rng.choice(TAGS)}:: {rng.choice(STATUSES)}")
+        elif roll < 0.45:
+            day = i % 28 + 1
+            lines.append(f"{indent}- LATER 任务 {i} SCHEDULED: <2024-01-{day:02d}>")
+        else:
+            tag, ref = rng.choice(TAGS), rng.randrange(1000)
+            lines.append(
+                f"{indent}- 内容 {i} #{tag} [[页面 {ref}]] "
+                "一些正文文字，用于模拟真实的笔记长度。"
+            )
+        i += 1
+
+    return "\n".join(lines) + "\n"
+
+
+def ensure_fixture(name: str, flashcard_tag: str) -> Path:
+    """生成（或复用已缓存的）样本图谱"""
+    pages, blocks, max_depth, journal = FIXTURES[name]
+    path = FIXTURES_DIR / name
+    marker = path / ".complete"
+    if marker.exists() and marker.read_text() == str(FIXTURE_VERSION):
+        return path
+
+    folder = path / ("journals" if journal else "pages")
+    folder.mkdir(parents=True, exist_ok=True)
+    for old in folder.glob("*.md"):
+        old.unlink()
+
+    rng = random.Random(f"{name}-{FIXTURE_VERSION}")
+    for index in range(pages):
+        filename = f"2024_01_{index + 1:02d}.md" if journal else f"page{index}.md"
+        content = generate_page(rng, index, blocks, max_depth, journal, flashcard_tag)
+        (folder / filename).write_text(content, encoding="utf-8")
+
+    marker.write_text(str(FIXTURE_VERSION))
+    return path
+
+
+def load_contents(path: Path) -> List[str]:
+    """读取样本中的所有页面"""
+    return [file.read_text(encoding="utf-8") for file in sorted(path.rglob("*.md"))]
+
+
+def measure(func: Callable, inputs: list, repeat: int) -> Dict[str, float]:
+    """测量耗时（取多次中的最好值）和 tracemalloc 内存峰值"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in inputs:
+            func(item)
+        times.append(time.perf_counter() - started)
+
+    # 内存单独测一轮，避免 tracemalloc 影响计时
+    tracemalloc.start()
+    for item in inputs:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "best_ms": round(min(times) * 1000, 3),
+        "mean_ms": round(sum(times) / len(times) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def git_commit() -> Optional[str]:
+    """当前提交（用于标记结果）"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCH_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def latest_results() -> Optional[Path]:
+    """上一次保存的结果"""
+    files = sorted(RESULTS_DIR.glob("*.json"))
+    return files[-1] if files else None
+
+
+def main(args: argparse.Namespace) -> None:
+    if args.baseline:
+        baseline_path = Path(args.baseline).resolve()
+    else:
+        baseline_path = latest_results()
+    prepare_workdir(Path(tempfile.mkdtemp(prefix="lupin-parsers-")), 1)
+
+    from loguru import logger
+
+    logger.remove()
+
+    from telegram_logseq.config.settings import Settings, settings
+    from telegram_logseq.services.flashcards import FlashcardService
+    from telegram_logseq.services.mindmap import MindmapService
+    from telegram_logseq.utils.text_utils import TextUtils
+
+    mindmap = MindmapService()
+    parsers: Dict[str, Callable[[str], object]] = {
+        "flashcards": FlashcardService.scan_for_flashcards,
+        "mindmap": mindmap.parse_markdown,
+        "extract_tags": TextUtils.extract_tags,
+        "extract_metadata": TextUtils.extract_metadata,
+        "extract_url": TextUtils.extract_url,
+        "tokenize": lambda content: list(TextUtils.tokenize(content)),
+    }
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name in args.fixture or FIXTURES:
+        contents = load_contents(ensure_fixture(name, settings.FLASHCARD_TAG))
+        size = sum(len(content.encode("utf-8")) for content in contents)
+        for parser, func in parsers.items():
+            if args.parser and parser not in args.parser:
+                continue
+            result = measure(func, contents, args.repeat)
+            seconds = result["best_ms"] / 1000
+            result["mb_per_s"] = round(size / 1024 / 1024 / seconds, 2)
+            results[f"{name}/{parser}"] = result
+
+    if not args.parser or "settings" in args.parser:
+        results["config/settings"] = measure(
+            lambda _: Settings(), [None] * 100, args.repeat
+        )
+
+    baseline = {}
+    if baseline_path and baseline_path.exists():
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        print(f"对比基准: {baseline_path.name}")
+
+    print(
+        f"{'benchmark':<32}{'best ms':>12}{'mean ms':>12}{'MB/s':>9}"
+        f"{'peak KiB':>11}{'Δ time':>9}{'Δ mem':>9}"
+    )
+    for key, r in results.items():
+        line = (
+            f"{key:<32}{r['best_ms']:>12.2f}{r['mean_ms']:>12.2f}"
+            f"{r.get('mb_per_s', 0):>9.1f}{r['peak_kib']:>11.1f}"
+        )
+        old = baseline.get(key)
+        if old and old["best_ms"] and old["peak_kib"]:
+            line += f"{(r['best_ms'] / old['best_ms'] - 1) * 100:>+8.1f}%"
+            line += f"{(r['peak_kib'] / old['peak_kib'] - 1) * 100:>+8.1f}%"
+        print(line)
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / time.strftime("%Y%m%d-%H%M%S.json")
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "commit": git_commit(),
+                    "python": platform.python_version(),
+                    "repeat": args.repeat,
+                    "results": results,
+                },
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"结果已保存: {output.relative_to(BENCH_DIR.parent)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="解析器微基准")
+    parser.add_argument("--fixture", choices=list(FIXTURES), action="append")
+    parser.add_argument(
+        "--parser",
+        choices=[
+            "flashcards",
+            "mindmap",
+            "extract_tags",
+            "extract_metadata",
+            "extract_url",
+            "tokenize",
+            "settings",
+        ],
+        action="append",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--baseline", default=None, help="对比的结果文件，默认使用上一次结果"
+    )
+    parser.add_argument("--no-save", action="store_true", help="不保存本次结果")
+    main(parser.parse_args())
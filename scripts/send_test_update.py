@@ -0,0 +1,54 @@
+"""向本地 Webhook 服务发送示例更新（模拟 Telegram 推送）
+
+用法:
+    python scripts/send_test_update.py --chat-id 123456 --text "hello"
+    python scripts/send_test_update.py --url http://127.0.0.1:8443/telegram --secret xxx
+"""
+
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+
+def build_update(update_id: int, chat_id: int, text: str) -> dict:
+    """构建一条文本消息更新"""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    headers = {}
+    if args.secret:
+        headers["X-Telegram-Bot-Api-Secret-Token"] = args.secret
+
+    base_url = args.url.rsplit("/", 1)[0]
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{base_url}/healthz") as response:
+            print("healthz:", response.status, await response.text())
+
+        for i in range(args.count):
+            update = build_update(int(time.time() * 1000) + i, args.chat_id, args.text)
+            started = time.perf_counter()
+            async with session.post(args.url, json=update, headers=headers) as response:
+                elapsed = (time.perf_counter() - started) * 1000
+                print(f"update {i + 1}: {response.status} ({elapsed:.1f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="向本地 Webhook 服务发送示例更新")
+    parser.add_argument("--url", default="http://127.0.0.1:8443/telegram")
+    parser.add_argument("--secret", default=None)
+    parser.add_argument("--chat-id", type=int, required=True)
+    parser.add_argument("--text", default="webhook test")
+    parser.add_argument("--count", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -4,14 +4,17 @@ from telegram.ext import (
     CommandHandler,
     MessageHandler,
     CallbackQueryHandler,
-    PicklePersistence,
     filters,
 )
 from loguru import logger
 
 from ..config.settings import settings
+from ..services.commit_queue import commit_queue
 from ..services.scheduler import SchedulerService
+from ..utils.metrics import instrument_handlers, metrics, start_metrics_server
 from .handlers import commands, messages, callbacks
+from .persistence import SqlitePersistence
+from .update_processor import ChatLaneUpdateProcessor
 
 
 class LogseqBot:
@@ -19,7 +22,10 @@ class LogseqBot:
 
     def __init__(self):
         """初始化机器人"""
-        self.persistence = PicklePersistence(filename="persistence")
+        # 首次启动时自动迁移旧的 PicklePersistence 文件 "persistence"
+        self.persistence = SqlitePersistence(
+            filepath="persistence.sqlite3", legacy_pickle="persistence"
+        )
         self.app: Optional[Application] = None
 
     async def initialize(self) -> None:
@@ -28,6 +34,9 @@ class LogseqBot:
             Application.builder()
             .token(settings.BOT_TOKEN)
             .persistence(self.persistence)
+            .concurrent_updates(
+                ChatLaneUpdateProcessor(settings.BOT_CONCURRENT_UPDATES)
+            )
             .build()
         )
 
@@ -37,6 +46,10 @@ class LogseqBot:
         self._register_message_handlers()
         # 注册回调查询处理器
         self._register_callback_handlers()
+        # 处理器耗时统计
+        instrument_handlers(self.app)
+        metrics.gauge("lupin_update_queue_depth", self.app.update_queue.qsize)
+        metrics.gauge("lupin_commit_queue_depth", lambda: len(commit_queue))
 
         # 设置定时任务
         await SchedulerService.setup_jobs(self.app, settings.BOT_AUTHORIZED_IDS)
@@ -98,6 +111,8 @@ class LogseqBot:
             await self.initialize()
 
         logger.info(f"启动 {settings.BOT_NAME}...")
+        if settings.METRICS_ENABLED:
+            await start_metrics_server(settings.METRICS_LISTEN, settings.METRICS_PORT)
         await self.app.initialize()
         await self.app.start()
         await self.app.run_polling()
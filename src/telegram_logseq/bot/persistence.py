@@ -0,0 +1,205 @@
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from telegram.ext import BasePersistence, PersistenceInput
+from loguru import logger
+import json
+import pickle
+import sqlite3
+
+
+# 与 telegram.ext 内部类型一致
+ConversationKey = Tuple[int | str, ...]
+ConversationDict = Dict[ConversationKey, object]
+CDCData = Tuple[list, Dict[str, str]]
+
+
+class SqlitePersistence(BasePersistence):
+    """基于 SQLite (WAL) 的机器人持久化
+
+    与 PicklePersistence 每次刷新都重写全部状态不同，这里只 upsert
+    发生变化的用户/聊天/机器人数据行；首次启动时自动迁移旧的 pickle 文件。
+    """
+
+    TABLES = ("user_data", "chat_data", "bot_data", "callback_data")
+
+    def __init__(
+        self,
+        filepath: str = "persistence.sqlite3",
+        legacy_pickle: Optional[str] = "persistence",
+        store_data: Optional[PersistenceInput] = None,
+        update_interval: float = 60,
+    ):
+        super().__init__(store_data=store_data, update_interval=update_interval)
+        self.filepath = filepath
+        self.legacy_pickle = legacy_pickle
+        self._conn: Optional[sqlite3.Connection] = None
+        # 最近写入的序列化内容，用于跳过未变化的数据
+        self._written: Dict[Tuple[str, Any], bytes] = {}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """数据库连接（首次使用时建表并迁移旧数据）"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.filepath)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for table in self.TABLES:
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} "
+                    "(key TEXT PRIMARY KEY, data BLOB NOT NULL)"
+                )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS conversations "
+                "(name TEXT, key TEXT, state BLOB, PRIMARY KEY (name, key))"
+            )
+            self._conn.commit()
+            self._migrate_pickle()
+        return self._conn
+
+    # ---- 读写工具 ----
+
+    def _upsert(self, table: str, key: Any, data: Any) -> None:
+        """写入一行，内容未变化时跳过"""
+        blob = pickle.dumps(data)
+        if self._written.get((table, key)) == blob:
+            return
+        self.conn.execute(
+            f"INSERT INTO {table} (key, data) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET data = excluded.data",
+            (str(key), blob),
+        )
+        self.conn.commit()
+        self._written[(table, key)] = blob
+
+    def _delete(self, table: str, key: Any) -> None:
+        """删除一行"""
+        self.conn.execute(f"DELETE FROM {table} WHERE key = ?", (str(key),))
+        self.conn.commit()
+        self._written.pop((table, key), None)
+
+    def _load_table(self, table: str) -> Dict[int, Any]:
+        """读取整张表"""
+        result = {}
+        for key, blob in self.conn.execute(f"SELECT key, data FROM {table}"):
+            result[int(key)] = pickle.loads(blob)
+            self._written[(table, int(key))] = blob
+        return result
+
+    def _load_single(self, table: str) -> Optional[Any]:
+        """读取单行表"""
+        row = self.conn.execute(
+            f"SELECT data FROM {table} WHERE key = ?", ("0",)
+        ).fetchone()
+        if not row:
+            return None
+        self._written[(table, 0)] = row[0]
+        return pickle.loads(row[0])
+
+    def _migrate_pickle(self) -> None:
+        """从旧的 PicklePersistence 文件迁移数据"""
+        if not self.legacy_pickle or not Path(self.legacy_pickle).exists():
+            return
+        if self._conn.execute("SELECT 1 FROM user_data LIMIT 1").fetchone():
+            return
+
+        try:
+            with open(self.legacy_pickle, "rb") as f:
+                data = pickle.load(f)
+
+            for table in ("user_data", "chat_data"):
+                for key, value in (data.get(table) or {}).items():
+                    self._upsert(table, key, value)
+            if data.get("bot_data") is not None:
+                self._upsert("bot_data", 0, data["bot_data"])
+            if data.get("callback_data") is not None:
+                self._upsert("callback_data", 0, data["callback_data"])
+            for name, states in (data.get("conversations") or {}).items():
+                for key, state in states.items():
+                    self._write_conversation(name, key, state)
+
+            Path(self.legacy_pickle).rename(f"{self.legacy_pickle}.migrated")
+            logger.info(f"已从 {self.legacy_pickle} 迁移持久化数据")
+        except Exception as e:
+            logger.error(f"迁移持久化数据失败: {e}")
+
+    def _write_conversation(
+        self, name: str, key: ConversationKey, state: Optional[object]
+    ) -> None:
+        """写入会话状态"""
+        if state is None:
+            self.conn.execute(
+                "DELETE FROM conversations WHERE name = ? AND key = ?",
+                (name, json.dumps(key)),
+            )
+        else:
+            self.conn.execute(
+                "INSERT INTO conversations (name, key, state) VALUES (?, ?, ?) "
+                "ON CONFLICT(name, key) DO UPDATE SET state = excluded.state",
+                (name, json.dumps(key), pickle.dumps(state)),
+            )
+        self.conn.commit()
+
+    # ---- BasePersistence 接口 ----
+
+    async def get_user_data(self) -> Dict[int, Any]:
+        return self._load_table("user_data")
+
+    async def get_chat_data(self) -> Dict[int, Any]:
+        return self._load_table("chat_data")
+
+    async def get_bot_data(self) -> Any:
+        data = self._load_single("bot_data")
+        if data is None:
+            return self.bot.context_types.bot_data() if self.bot else {}
+        return data
+
+    async def get_callback_data(self) -> Optional[CDCData]:
+        data = self._load_single("callback_data")
+        return deepcopy(data) if data is not None else None
+
+    async def get_conversations(self, name: str) -> ConversationDict:
+        return {
+            tuple(json.loads(key)): pickle.loads(state)
+            for key, state in self.conn.execute(
+                "SELECT key, state FROM conversations WHERE name = ?", (name,)
+            )
+        }
+
+    async def update_conversation(
+        self, name: str, key: ConversationKey, new_state: Optional[object]
+    ) -> None:
+        self._write_conversation(name, key, new_state)
+
+    async def update_user_data(self, user_id: int, data: Any) -> None:
+        self._upsert("user_data", user_id, data)
+
+    async def update_chat_data(self, chat_id: int, data: Any) -> None:
+        self._upsert("chat_data", chat_id, data)
+
+    async def update_bot_data(self, data: Any) -> None:
+        self._upsert("bot_data", 0, data)
+
+    async def update_callback_data(self, data: CDCData) -> None:
+        self._upsert("callback_data", 0, data)
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        self._delete("chat_data", chat_id)
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._delete("user_data", user_id)
+
+    async def refresh_user_data(self, user_id: int, user_data: Any) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: Any) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: Any) -> None:
+        pass
+
+    async def flush(self) -> None:
+        """关闭数据库连接（每次更新都已提交，无需额外写入）"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
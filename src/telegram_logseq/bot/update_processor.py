@@ -0,0 +1,59 @@
+from typing import Awaitable, Hashable, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from ..utils.locks import KeyedLocks
+
+
+class ChatLaneUpdateProcessor(BaseUpdateProcessor):
+    """按聊天分道的并发更新处理器
+
+    不同聊天的更新并发处理，同一聊天的更新按到达顺序依次处理，
+    保证同一聊天的消息按发送顺序写入日志。
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # 每个聊天一把锁，空闲时自动回收
+        self._lanes = KeyedLocks()
+
+    @staticmethod
+    def lane_key(update: object) -> Optional[Hashable]:
+        """获取更新所属的处理通道，无法归类的更新不做串行化
+
+        相册消息不进入通道：相册在收集窗口结束后才合并写入，
+        由处理器通过 lane() 按到达顺序占用通道直到写入完成。
+        """
+        if isinstance(update, Update) and update.effective_chat:
+            message = update.effective_message
+            if message and message.media_group_id:
+                return None
+            return update.effective_chat.id
+        return None
+
+    def lane(self, key: Hashable):
+        """占用指定聊天的通道（同一聊天的后续更新排在其后处理）"""
+        return self._lanes.lock(key)
+
+    async def process_update(
+        self, update: object, coroutine: "Awaitable[object]"
+    ) -> None:
+        """先进入聊天通道再占用并发名额，避免同一聊天的积压占满所有名额"""
+        key = self.lane_key(update)
+        if key is None:
+            await super().process_update(update, coroutine)
+            return
+
+        async with self._lanes.lock(key):
+            await super().process_update(update, coroutine)
+
+    async def do_process_update(
+        self, update: object, coroutine: "Awaitable[object]"
+    ) -> None:
+        await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
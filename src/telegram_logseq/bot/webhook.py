@@ -0,0 +1,122 @@
+from typing import Optional
+from telegram import Update
+from telegram.ext import Application
+from loguru import logger
+from aiohttp import web
+import asyncio
+import hmac
+
+from ..config.settings import settings
+from ..utils.metrics import metrics
+
+
+class WebhookServer:
+    """Webhook 模式的轻量 HTTP 服务
+
+    - POST {path}: 接收 Telegram 推送的更新（校验 secret token）
+    - GET /healthz: 健康检查
+    - GET /metrics: Prometheus 指标（开启 [Metrics] 时）
+    """
+
+    SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+    def __init__(
+        self,
+        application: Application,
+        path: str = "/telegram",
+        secret_token: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 8443,
+    ):
+        self.application = application
+        self.path = path
+        self.secret_token = secret_token
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    def build_app(self) -> web.Application:
+        """构建 aiohttp 应用"""
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get("/healthz", self.handle_health)
+        if settings.METRICS_ENABLED:
+            app.router.add_get("/metrics", self.handle_metrics)
+        return app
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """接收更新并放入应用的更新队列"""
+        if self.secret_token and not hmac.compare_digest(
+            request.headers.get(self.SECRET_HEADER, ""), self.secret_token
+        ):
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.application.bot)
+        except Exception as e:
+            logger.error(f"解析 Webhook 更新失败: {e}")
+            return web.Response(status=400)
+
+        await self.application.update_queue.put(update)
+        return web.Response(status=200)
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """健康检查"""
+        return web.json_response(
+            {
+                "status": "ok" if self.application.running else "starting",
+                "pending_updates": self.application.update_queue.qsize(),
+            }
+        )
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Prometheus 指标"""
+        return web.Response(text=metrics.render(), content_type="text/plain")
+
+    async def start(self) -> None:
+        """启动 HTTP 服务"""
+        self._runner = web.AppRunner(self.build_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Webhook 服务已启动: http://{self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        """停止 HTTP 服务"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def run_webhook(application: Application) -> None:
+    """以 Webhook 模式运行机器人，直到被取消"""
+    server = WebhookServer(
+        application,
+        path=settings.WEBHOOK_PATH,
+        secret_token=settings.WEBHOOK_SECRET,
+        host=settings.WEBHOOK_LISTEN,
+        port=settings.WEBHOOK_PORT,
+    )
+
+    # 与 run_polling 一致：initialize 之后调用 post_init，shutdown 之后调用 post_shutdown
+    try:
+        async with application:
+            if application.post_init:
+                await application.post_init(application)
+            await application.start()
+            await server.start()
+            try:
+                # 配置了公网地址时向 Telegram 注册 Webhook（由反向代理转发到本地服务）
+                if settings.WEBHOOK_URL:
+                    await application.bot.set_webhook(
+                        url=settings.WEBHOOK_URL.rstrip("/") + settings.WEBHOOK_PATH,
+                        secret_token=settings.WEBHOOK_SECRET,
+                        allowed_updates=Update.ALL_TYPES,
+                    )
+                await asyncio.Event().wait()
+            finally:
+                await server.stop()
+                await application.stop()
+    finally:
+        if application.post_shutdown:
+            await application.post_shutdown(application)
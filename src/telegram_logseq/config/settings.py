@@ -26,6 +26,21 @@ class Settings(BaseSettings):
             "BOT_AUTHORIZED_IDS": [
                 int(id.strip()) for id in config.get("Bot", "AuthorizedIds").split(",")
             ],
+            "BOT_CONCURRENT_UPDATES": config.getint(
+                "Bot", "ConcurrentUpdates", fallback=8
+            ),
+            "BOT_MODE": config.get("Bot", "Mode", fallback="polling"),
+            "WEBHOOK_LISTEN": config.get("Webhook", "Listen", fallback="127.0.0.1"),
+            "WEBHOOK_PORT": config.getint("Webhook", "Port", fallback=8443),
+            "WEBHOOK_PATH": config.get("Webhook", "Path", fallback="/telegram"),
+            "WEBHOOK_SECRET": config.get("Webhook", "SecretToken", fallback=None)
+            or None,
+            "WEBHOOK_URL": config.get("Webhook", "Url", fallback=None) or None,
+            "METRICS_ENABLED": config.getboolean(
+                "Metrics", "Enabled", fallback=False
+            ),
+            "METRICS_LISTEN": config.get("Metrics", "Listen", fallback="127.0.0.1"),
+            "METRICS_PORT": config.getint("Metrics", "Port", fallback=9090),
             "GITHUB_TOKEN": config.get("GitHub", "Token"),
             "GITHUB_BRANCH": config.get("GitHub", "Branch"),
             "GITHUB_USER": config.get("GitHub", "User"),
@@ -61,6 +76,27 @@ class Settings(BaseSettings):
             ),
             "FLASHCARD_TAG": config.get("Flashcard", "Tag", fallback="#flashcard"),
             "HYPOTHESIS_TOKEN": config.get("Hypothesis", "Token", fallback=None),
+            "MEDIA_TRANSCODE": config.getboolean(
+                "Media", "Transcode", fallback=False
+            ),
+            "MEDIA_FORMAT": config.get("Media", "Format", fallback="webp"),
+            "MEDIA_QUALITY": config.getint("Media", "Quality", fallback=80),
+            "MEDIA_PHOTO_MAX_SIZE": config.getint(
+                "Media", "PhotoMaxSize", fallback=2048
+            ),
+            "MEDIA_DOCUMENT_MAX_SIZE": config.getint(
+                "Media", "DocumentMaxSize", fallback=0
+            ),
+            "MEDIA_THUMBNAIL_SIZE": config.getint(
+                "Media", "ThumbnailSize", fallback=0
+            ),
+            "MEDIA_WORKERS": config.getint("Media", "Workers", fallback=2),
+            "MEDIA_KEEP_LOCAL_COPY": config.getboolean(
+                "Media", "KeepLocalCopy", fallback=True
+            ),
+            "MEDIA_GROUP_WINDOW": config.getfloat(
+                "Media", "GroupWindow", fallback=1.5
+            ),
         }
 
         super().__init__(**settings_dict)
@@ -69,6 +105,20 @@ class Settings(BaseSettings):
     BOT_TOKEN: str
     BOT_NAME: str = "Lupin"
     BOT_AUTHORIZED_IDS: List[int]
+    BOT_CONCURRENT_UPDATES: int = 8
+    BOT_MODE: str = "polling"
+
+    # Webhook 配置
+    WEBHOOK_LISTEN: str = "127.0.0.1"
+    WEBHOOK_PORT: int = 8443
+    WEBHOOK_PATH: str = "/telegram"
+    WEBHOOK_SECRET: Optional[str] = None
+    WEBHOOK_URL: Optional[str] = None
+
+    # 指标配置
+    METRICS_ENABLED: bool = False
+    METRICS_LISTEN: str = "127.0.0.1"
+    METRICS_PORT: int = 9090
 
     # GitHub 配置
     GITHUB_TOKEN: str
@@ -100,6 +150,17 @@ class Settings(BaseSettings):
     # Hypothesis 配置
     HYPOTHESIS_TOKEN: Optional[str] = None
 
+    # 媒体处理配置
+    MEDIA_TRANSCODE: bool = False
+    MEDIA_FORMAT: str = "webp"
+    MEDIA_QUALITY: int = 80
+    MEDIA_PHOTO_MAX_SIZE: int = 2048
+    MEDIA_DOCUMENT_MAX_SIZE: int = 0
+    MEDIA_THUMBNAIL_SIZE: int = 0
+    MEDIA_WORKERS: int = 2
+    MEDIA_KEEP_LOCAL_COPY: bool = True
+    MEDIA_GROUP_WINDOW: float = 1.5
+
     # 添加 BOOKMARK_TAG 属性
     BOOKMARK_TAG: str = "#bookmark"
 
@@ -6,7 +6,12 @@ from loguru import logger
 from ..config.settings import settings
 from ..constants.messages import messages
 from ..services.flashcard import FlashcardService
+from ..services.commit_queue import commit_queue
+from ..services.graph_index import graph_indexes
 from ..services.mindmap import MindmapService
+from ..services.task_index import OPEN_MARKERS, task_index
+from ..utils.locks import file_locks
+from .commands import build_backlinks_reply, build_todo_reply
 
 
 async def handle_flashcard_callback(
@@ -100,6 +105,72 @@ async def handle_mindmap_callback(
     await query.answer()
 
 
+async def handle_backlinks_callback(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """处理反向链接翻页回调"""
+    if not update.callback_query:
+        return
+
+    query = update.callback_query
+    names = context.chat_data.get("backlinks", {}).get(query.message.message_id)
+    if not names:
+        await query.answer("查询已过期，请重新发送 /backlinks")
+        return
+
+    offset = int(query.data.split(":", 1)[1])
+    await graph_indexes.ready()
+    text, reply_markup = build_backlinks_reply(names, offset)
+    await query.edit_message_text(text=text, reply_markup=reply_markup)
+    await query.answer()
+
+
+async def handle_todo_callback(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """处理任务完成回调：只改写任务所在的一行并提交"""
+    if not update.callback_query:
+        return
+
+    query = update.callback_query
+    task_id = query.data.split(":", 1)[1]
+    await graph_indexes.ready()
+    task = task_index.get(task_id)
+    if not task or task.marker not in OPEN_MARKERS:
+        await query.answer("任务不存在或已完成")
+        return
+
+    full_path = task_index.repo_path / task.rel_path
+    try:
+        async with file_locks.path_lock(full_path):
+            # 先按磁盘内容更新索引：ID 包含行号和任务文本，
+            # 文件在生成按钮后被修改时 ID 不再存在，拒绝本次点击
+            await graph_indexes.file_changed(full_path)
+            task = task_index.get(task_id)
+            if not task or task.marker not in OPEN_MARKERS:
+                raise ValueError("任务已被修改或移动，请重新发送 /todo")
+            content = task_index.set_marker(task, "DONE")
+            await graph_indexes.file_changed(full_path)
+            committed = commit_queue.submit(
+                task.rel_path, f"完成任务: {task.text}", {task.rel_path: content}
+            )
+        success = await committed
+    except ValueError as e:
+        await query.answer(str(e))
+        return
+    except Exception as e:
+        logger.error(f"完成任务失败: {e}")
+        await query.answer(f"完成任务失败: {str(e)}")
+        return
+
+    rel_path, today = context.chat_data.get("todo", {}).get(
+        query.message.message_id, (None, False)
+    )
+    text, reply_markup = build_todo_reply(rel_path, today)
+    await query.edit_message_text(text=text, reply_markup=reply_markup)
+    await query.answer("已完成" if success else "已完成，但提交到 GitHub 失败")
+
+
 async def show_flashcard(
     chat_id: int,
     context: ContextTypes.DEFAULT_TYPE,
@@ -1,15 +1,17 @@
-from telegram import Update
+from datetime import date
+from typing import List, Optional, Tuple
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import CallbackContext
 from loguru import logger
 
-from ..services.mindmap import MindmapService
-from ..services.github import GitHubService
-from ..services.hypothesis import HypothesisService
-
-# 初始化服务
-mindmap_service = MindmapService()
-github_service = GitHubService()
-hypothesis_service = HypothesisService()
+from ..config.settings import settings
+from ..services.backlink_index import backlink_index
+from ..services.container import services
+from ..services.graph_index import graph_indexes
+from ..services.page_index import page_index
+from ..services.property_index import PropertyIndexService, property_index
+from ..services.task_index import task_index
+from ..utils.profiler import profiler
 
 
 async def start_command(update: Update, context: CallbackContext) -> None:
@@ -26,7 +28,13 @@ async def help_command(update: Update, context: CallbackContext) -> None:
         "/help - 显示此帮助信息\n"
         "/pull - 从 GitHub 拉取最新内容\n"
         "/mindmap <页面名> - 生成思维导图\n"
-        "/anno <URL> - 获取网页标注\n\n"
+        "/nsmap <命名空间> - 生成命名空间思维导图\n"
+        "/linkmap <页面名> [跳数] - 生成页面链接邻域思维导图\n"
+        "/backlinks <页面名> - 查看引用该页面的块\n"
+        "/todo [页面名|today] - 列出未完成的任务\n"
+        "/query <属性>:: <值> ... - 按属性查询页面和块\n"
+        "/anno <URL> [URL...] - 获取网页标注\n"
+        "/profile [秒数] - 性能采样（仅管理员）\n\n"
         "功能说明：\n"
         "1. 直接发送消息 - 添加到当天的日志\n"
         "2. TODO + 内容 - 自动转换为待办事项\n"
@@ -41,7 +49,7 @@ async def help_command(update: Update, context: CallbackContext) -> None:
 async def pull_now_command(update: Update, context: CallbackContext) -> None:
     """立即拉取命令"""
     try:
-        success = await github_service.pull()
+        success = await services.github.pull()
         if success:
             await update.message.reply_text("拉取成功")
         else:
@@ -59,13 +67,71 @@ async def mindmap_command(update: Update, context: CallbackContext) -> None:
             return
 
         page_name = " ".join(context.args)
-        html_path = await mindmap_service.generate_mindmap(page_name)
+        html_path = await services.mindmap.generate_mindmap(page_name)
 
         with open(html_path, "rb") as f:
             await update.message.reply_document(
                 document=f, filename=f"{page_name}.html", caption="思维导图已生成"
             )
 
+    except FileNotFoundError:
+        suggestions = page_index.suggest(page_name)
+        if suggestions:
+            names = "、".join(name for name, _ in suggestions)
+            await update.message.reply_text(f"页面不存在，您是不是要找: {names}")
+        else:
+            await update.message.reply_text("页面不存在")
+    except Exception as e:
+        logger.error(f"生成思维导图失败: {e}")
+        await update.message.reply_text(f"生成思维导图失败: {str(e)}")
+
+
+async def nsmap_command(update: Update, context: CallbackContext) -> None:
+    """命名空间思维导图命令"""
+    try:
+        if not context.args:
+            await update.message.reply_text("请指定命名空间")
+            return
+
+        namespace = " ".join(context.args)
+        html_path = await services.mindmap.generate_namespace_mindmap(namespace)
+
+        with open(html_path, "rb") as f:
+            await update.message.reply_document(
+                document=f,
+                filename=f"{namespace.replace('/', '_')}.html",
+                caption="思维导图已生成",
+            )
+
+    except FileNotFoundError:
+        await update.message.reply_text("命名空间不存在")
+    except Exception as e:
+        logger.error(f"生成思维导图失败: {e}")
+        await update.message.reply_text(f"生成思维导图失败: {str(e)}")
+
+
+async def linkmap_command(update: Update, context: CallbackContext) -> None:
+    """页面链接邻域思维导图命令"""
+    try:
+        if not context.args:
+            await update.message.reply_text("请指定页面名称")
+            return
+
+        args = list(context.args)
+        hops = 2
+        if len(args) > 1 and args[-1].isdigit():
+            hops = int(args.pop())
+
+        page_name = " ".join(args)
+        html_path = await services.mindmap.generate_graph_mindmap(page_name, hops)
+
+        with open(html_path, "rb") as f:
+            await update.message.reply_document(
+                document=f,
+                filename=f"{page_name.replace('/', '_')}.html",
+                caption="思维导图已生成",
+            )
+
     except FileNotFoundError:
         await update.message.reply_text("页面不存在")
     except Exception as e:
@@ -73,14 +139,208 @@ async def mindmap_command(update: Update, context: CallbackContext) -> None:
         await update.message.reply_text(f"生成思维导图失败: {str(e)}")
 
 
+# 反向链接每页显示的条数
+BACKLINKS_PAGE_SIZE = 10
+# 每个聊天保留分页状态的查询数量
+BACKLINKS_KEEP = 20
+
+
+def build_backlinks_reply(
+    names: List[str], offset: int
+) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    """生成反向链接的分页回复
+
+    Args:
+        names: 页面名及其别名
+        offset: 起始条目
+
+    Returns:
+        (回复文本, 翻页按钮)
+    """
+    results = backlink_index.backlinks(names)
+    if not results:
+        return f"没有块引用 {names[0]}", None
+
+    last_page = (len(results) - 1) // BACKLINKS_PAGE_SIZE * BACKLINKS_PAGE_SIZE
+    offset = max(0, min(offset, last_page))
+    items = results[offset : offset + BACKLINKS_PAGE_SIZE]
+
+    lines = [
+        f"{names[0]} 的反向链接"
+        f"（第 {offset + 1}-{offset + len(items)} 条，共 {len(results)} 条）"
+    ]
+    current = None
+    for source, text in items:
+        if source != current:
+            lines.append(f"\n[[{source}]]")
+            current = source
+        lines.append(f"  • {text}")
+
+    buttons = []
+    if offset > 0:
+        buttons.append(
+            InlineKeyboardButton(
+                "上一页", callback_data=f"backlinks:{offset - BACKLINKS_PAGE_SIZE}"
+            )
+        )
+    if offset + BACKLINKS_PAGE_SIZE < len(results):
+        buttons.append(
+            InlineKeyboardButton(
+                "下一页", callback_data=f"backlinks:{offset + BACKLINKS_PAGE_SIZE}"
+            )
+        )
+    return "\n".join(lines), InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+async def backlinks_command(update: Update, context: CallbackContext) -> None:
+    """反向链接命令"""
+    try:
+        if not context.args:
+            await update.message.reply_text("请指定页面名称")
+            return
+
+        page_name = " ".join(context.args)
+        names = [page_name]
+        await graph_indexes.ready()
+        # 已有页面同时查询其别名
+        rel_path = page_index.resolve(page_name)
+        if rel_path and rel_path in page_index.files:
+            entry = page_index.files[rel_path]
+            names = [entry["page"], *entry["aliases"]]
+
+        text, markup = build_backlinks_reply(names, 0)
+        message = await update.message.reply_text(text, reply_markup=markup)
+
+        # 记录查询，供翻页按钮使用
+        if markup:
+            queries = context.chat_data.setdefault("backlinks", {})
+            queries[message.message_id] = names
+            for message_id in sorted(queries)[:-BACKLINKS_KEEP]:
+                del queries[message_id]
+
+    except Exception as e:
+        logger.error(f"查询反向链接失败: {e}")
+        await update.message.reply_text(f"查询反向链接失败: {str(e)}")
+
+
+# /todo 每次显示的任务数量
+TODO_LIMIT = 10
+# 每个会话保留的 /todo 筛选条件数量
+TODO_KEEP = 20
+
+
+def build_todo_reply(
+    rel_path: Optional[str] = None, today: bool = False
+) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    """生成待办任务列表回复
+
+    Args:
+        rel_path: 只列出指定文件中的任务
+        today: 只列出今天及之前到期的任务
+
+    Returns:
+        (回复文本, 完成按钮)
+    """
+    tasks = task_index.tasks(
+        rel_path=rel_path, due_before=date.today() if today else None
+    )
+    if not tasks:
+        return "没有未完成的任务", None
+
+    lines = [f"未完成的任务（共 {len(tasks)} 条）："]
+    buttons = []
+    for number, task in enumerate(tasks[:TODO_LIMIT], 1):
+        line = f"{number}. {task.marker} {task.text} · {task.page}"
+        if task.deadline:
+            line += f" · 截止 {task.deadline}"
+        elif task.scheduled:
+            line += f" · 计划 {task.scheduled}"
+        lines.append(line)
+        buttons.append(
+            InlineKeyboardButton(f"完成 {number}", callback_data=f"todo:{task.id}")
+        )
+    if len(tasks) > TODO_LIMIT:
+        lines.append(f"…… 还有 {len(tasks) - TODO_LIMIT} 条")
+
+    keyboard = [buttons[i : i + 5] for i in range(0, len(buttons), 5)]
+    return "\n".join(lines), InlineKeyboardMarkup(keyboard)
+
+
+async def todo_command(update: Update, context: CallbackContext) -> None:
+    """待办任务命令"""
+    try:
+        await graph_indexes.ready()
+        rel_path, today = None, False
+        if context.args:
+            query = " ".join(context.args)
+            if query.lower() in ("today", "今天"):
+                today = True
+            else:
+                rel_path = page_index.resolve(query)
+                if not rel_path:
+                    await update.message.reply_text("页面不存在")
+                    return
+
+        text, markup = build_todo_reply(rel_path, today)
+        message = await update.message.reply_text(text, reply_markup=markup)
+
+        # 记录筛选条件，完成任务后按相同条件刷新列表
+        if markup:
+            queries = context.chat_data.setdefault("todo", {})
+            queries[message.message_id] = (rel_path, today)
+            for message_id in sorted(queries)[:-TODO_KEEP]:
+                del queries[message_id]
+
+    except Exception as e:
+        logger.error(f"列出任务失败: {e}")
+        await update.message.reply_text(f"列出任务失败: {str(e)}")
+
+
+# /query 最多显示的结果数量
+QUERY_LIMIT = 20
+
+
+async def query_command(update: Update, context: CallbackContext) -> None:
+    """属性查询命令，如 /query type:: book status:: reading"""
+    try:
+        conditions = PropertyIndexService.parse_query(" ".join(context.args or []))
+        if not conditions:
+            await update.message.reply_text(
+                "请指定查询条件，如: /query type:: book status:: reading"
+            )
+            return
+
+        await graph_indexes.ready()
+        results = property_index.query(conditions)
+        if not results:
+            await update.message.reply_text("没有匹配的页面或块")
+            return
+
+        lines = [f"查询结果（共 {len(results)} 条）："]
+        current = None
+        for page, text in results[:QUERY_LIMIT]:
+            if page != current:
+                lines.append(f"\n[[{page}]]")
+                current = page
+            if text is not None:
+                lines.append(f"  • {text}")
+        if len(results) > QUERY_LIMIT:
+            lines.append(f"\n…… 还有 {len(results) - QUERY_LIMIT} 条")
+        await update.message.reply_text("\n".join(lines))
+
+    except Exception as e:
+        logger.error(f"属性查询失败: {e}")
+        await update.message.reply_text(f"属性查询失败: {str(e)}")
+
+
 async def hypothesis_command(update: Update, context: CallbackContext) -> None:
     """Hypothesis 同步命令"""
-    if not hypothesis_service:
+    if not settings.HYPOTHESIS_TOKEN:
         await update.message.reply_text("Hypothesis 功能未启用，请先配置 Token")
         return
 
     try:
-        count = await hypothesis_service.sync_annotations()
+        count = await services.hypothesis.sync_annotations()
         await update.message.reply_text(f"同步完成，共同步 {count} 条标注")
     except Exception as e:
         logger.error(f"同步 Hypothesis 失败: {e}")
@@ -88,28 +348,74 @@ async def hypothesis_command(update: Update, context: CallbackContext) -> None:
 
 
 async def anno_command(update: Update, context: CallbackContext) -> None:
-    """获取网页标注命令"""
+    """获取网页标注命令（支持多个 URL）"""
     try:
         if not context.args:
             await update.message.reply_text("请提供网页 URL")
             return
 
-        url = context.args[0]
-        await update.message.reply_text(f"正在获取 {url} 的标注...")
+        urls = list(context.args)
+        await update.message.reply_text(f"正在获取 {len(urls)} 个网页的标注...")
 
-        # 获取标注
-        annotations = await hypothesis_service.get_annotations(url)
-        if not annotations:
+        # 并发获取标注
+        results = await services.hypothesis.get_annotations_many(urls)
+        results = {url: rows for url, rows in results.items() if rows}
+        if not results:
             await update.message.reply_text("未找到标注")
             return
 
-        # 生成 Markdown
-        content = await hypothesis_service.generate_markdown(annotations)
+        # 只保存新增或编辑过的标注
+        count = 0
+        for annotations in results.values():
+            count += await services.hypothesis.save_new_annotations(annotations)
 
-        # 保存并提交
-        await hypothesis_service.save_annotations(content)
-        await update.message.reply_text("标注已保存")
+        if count:
+            await update.message.reply_text(f"标注已保存，共 {count} 条")
+        else:
+            await update.message.reply_text("没有新的标注")
 
     except Exception as e:
         logger.error(f"获取标注失败: {e}")
         await update.message.reply_text(f"获取标注失败: {str(e)}")
+
+
+async def profile_command(update: Update, context: CallbackContext) -> None:
+    """性能采样命令（仅限第一个授权用户）"""
+    user = update.effective_user
+    admin_id = settings.BOT_AUTHORIZED_IDS[0] if settings.BOT_AUTHORIZED_IDS else None
+    if user is None or user.id != admin_id:
+        await update.message.reply_text("仅管理员可使用此命令")
+        return
+
+    try:
+        seconds = int(context.args[0]) if context.args else 30
+    except ValueError:
+        await update.message.reply_text("采样秒数必须是整数")
+        return
+    seconds = max(1, min(seconds, profiler.MAX_SECONDS))
+
+    # 在创建后台任务之前同步占用采样器，连续两次 /profile 不会同时开始
+    try:
+        sampling = profiler.profile(seconds)
+    except RuntimeError as e:
+        await update.message.reply_text(str(e))
+        return
+
+    async def run_profile() -> None:
+        try:
+            collapsed, samples = await sampling
+            await update.message.reply_document(
+                document=collapsed.encode("utf-8"),
+                filename=profiler.filename(),
+                caption=(
+                    f"采样 {seconds} 秒，共 {samples} 次\n"
+                    "可用 flamegraph.pl 或 speedscope 打开"
+                ),
+            )
+        except Exception as e:
+            logger.error(f"性能采样失败: {e}")
+            await update.message.reply_text(f"性能采样失败: {str(e)}")
+
+    # 在后台采样，不阻塞当前聊天的后续消息
+    context.application.create_task(run_profile(), update=update)
+    await update.message.reply_text(f"开始性能采样 {seconds} 秒...")
@@ -1,23 +1,29 @@
-from typing import Optional
-from telegram import Update
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+from telegram import Message, Update
 from telegram.ext import ContextTypes
 from loguru import logger
 from pathlib import Path
+import asyncio
 import re
-import requests
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-from datetime import datetime
-import os
 
+from ..bot.update_processor import ChatLaneUpdateProcessor
 from ..config.settings import settings
 from ..constants.messages import messages
-from ..services.github import GitHubService
-from ..services.journal import JournalService
-from ..services.media import MediaService
+from ..services.commit_queue import commit_queue
+from ..services.container import services
+from ..services.graph_index import graph_indexes
+from ..services.page_index import page_index
 from ..utils.time_utils import TimeUtils
+from ..utils.locks import file_locks
 from ..utils.text_utils import TextUtils
-from ..utils.web_utils import get_web_page_title
+from ..utils.web_utils import (
+    TweetEmbedder,
+    generate_twitter_iframe,
+    get_web_page_title,
+    title_resolver,
+)
 
 
 class MessageHandler:
@@ -25,20 +31,49 @@ class MessageHandler:
 
     def __init__(self):
         """初始化处理器"""
-        self.journal_service = JournalService()
-        self.media_service = MediaService()
-        self.github_service = GitHubService()
+        self.journal_service = services.journal
+        self.media_service = services.media
+        self.github_service = services.github
+        # 相册收集: "chat_id:media_group_id" -> 消息列表
+        self._albums: Dict[str, List[Message]] = {}
 
-    def get_url_title(self, url: str) -> str:
+    async def get_url_title(self, url: str) -> str:
         """获取 URL 的标题"""
-        try:
-            response = requests.get(url, timeout=5)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            title = soup.title.string if soup.title else urlparse(url).netloc
-            return title.strip()
-        except:
-            return urlparse(url).netloc
+        return await get_web_page_title(url) or urlparse(url).netloc
+
+    async def format_bookmarks(self, text: str) -> str:
+        """把消息中的裸链接替换为 [标题](链接)，并添加书签标签
+
+        多个链接并发解析，已收藏过的链接直接命中缓存。
+        """
+        urls = TextUtils.extract_urls(text)
+        if not urls or "](" in text:
+            return text
+
+        # 推文使用 oEmbed 嵌入，其余链接解析标题
+        tweet_urls = [url for url in urls if TweetEmbedder.tweet_id(url)]
+        other_urls = [url for url in urls if url not in tweet_urls]
+        titles, iframes = await asyncio.gather(
+            title_resolver.get_titles(other_urls),
+            asyncio.gather(*(generate_twitter_iframe(url) for url in tweet_urls)),
+        )
+        embeds = {url: iframe for url, iframe in zip(tweet_urls, iframes) if iframe}
+
+        def to_link(match: re.Match) -> str:
+            url = match.group(0)
+            if url in embeds:
+                return embeds[url]
+            title = titles.get(url) or urlparse(url).netloc
+            title = title.replace("[", "(").replace("]", ")")
+            return f"[{title}]({url})"
+
+        # 长链接优先，避免前缀相同的链接被重复替换
+        pattern = "|".join(map(re.escape, sorted(set(urls), key=len, reverse=True)))
+        text = re.sub(pattern, to_link, text)
+
+        if settings.BOOKMARK_TAG not in text:
+            text = f"{text} {settings.BOOKMARK_TAG}"
+        return text
 
     async def handle_text(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -48,33 +83,54 @@ class MessageHandler:
             text = update.message.text
 
             # 检查是否是自定义路径格式: >>path/to/file: content
-            custom_path_match = re.match(r"^>>([^:]+):\s*(.+)$", text)
+            # 使用 >>+path: 强制新建文件，跳过相似页面检查
+            custom_path_match = re.match(r"^>>(\+?)([^:]+):\s*(.+)$", text)
 
             if custom_path_match:
                 # 提取路径和内容
-                file_path, content = custom_path_match.groups()
+                force_new, file_path, content = custom_path_match.groups()
+                file_path = file_path.strip()
                 # 确保路径以 .md 结尾
                 if not file_path.endswith(".md"):
                     file_path += ".md"
+
+                # 通过页面名索引解析已有页面
+                if not (Path.cwd() / settings.GITHUB_REPO / file_path).exists():
+                    await graph_indexes.ready()
+                    resolved = page_index.resolve(file_path.removesuffix(".md"))
+                    if resolved:
+                        file_path = resolved
+                    elif not force_new:
+                        suggestions = page_index.suggest(file_path.removesuffix(".md"))
+                        if suggestions:
+                            names = "、".join(name for name, _ in suggestions)
+                            await update.message.reply_text(
+                                f"未找到 {file_path}，您是不是要找: {names}\n"
+                                f"如需新建文件，请使用 >>+路径: 内容"
+                            )
+                            return
+
                 # 构建完整路径
                 full_path = Path.cwd() / settings.GITHUB_REPO / file_path
 
                 # 创建目录
                 full_path.parent.mkdir(parents=True, exist_ok=True)
 
-                # 添加内容到文件
-                with open(full_path, "a", encoding="utf-8") as f:
-                    f.write(f"{content}\n")
+                # 追加、读取快照、入队在文件锁内完成，提交在锁外进行
+                async with file_locks.path_lock(full_path):
+                    # 添加内容到文件
+                    with open(full_path, "a", encoding="utf-8") as f:
+                        f.write(f"{content}\n")
+                    await graph_indexes.file_changed(full_path)
 
-                # 提交到 GitHub
-                with open(full_path, "r", encoding="utf-8") as f:
-                    file_content = f.read()
+                    with open(full_path, "r", encoding="utf-8") as f:
+                        file_content = f.read()
+                    committed = commit_queue.submit(
+                        file_path, f"更新文件: {file_path}", {file_path: file_content}
+                    )
 
-                await self.github_service.commit_and_push(
-                    message=f"更新文件: {file_path}",
-                    path=file_path,
-                    content=file_content,
-                )
+                # 提交到 GitHub
+                await committed
 
                 await update.message.reply_text(f"已添加到 {file_path}")
 
@@ -83,22 +139,10 @@ class MessageHandler:
                 if text.lower().startswith("todo"):
                     content = f"- LATER {text[4:].strip()}"
                 else:
-                    content = text
+                    content = await self.format_bookmarks(text)
 
-                # 添加到默认的日志文件
-                path = await self.journal_service.add_entry(content)
-                if not path:
-                    raise Exception("添加日志条目失败")
-
-                # 获取文件内容
-                with open(path, "r", encoding="utf-8") as f:
-                    content = f.read()
-
-                # 提交到 GitHub
-                relative_path = str(path.relative_to(Path.cwd() / settings.GITHUB_REPO))
-                success = await self.github_service.commit_and_push(
-                    message="更新日志", path=relative_path, content=content
-                )
+                # 添加到默认的日志文件并提交
+                success = await self._add_journal_entry(content)
 
                 if success:
                     await update.message.reply_text("已添加到日志")
@@ -113,56 +157,13 @@ class MessageHandler:
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> None:
         """处理媒体消息"""
-        try:
-            # 获取文件
-            if update.message.photo:
-                # 如果是图片，获取最大尺寸的版本
-                file = await context.bot.get_file(update.message.photo[-1].file_id)
-                file_ext = ".jpg"
-            else:
-                # 如果是文档
-                file = await context.bot.get_file(update.message.document.file_id)
-                file_ext = os.path.splitext(update.message.document.file_name)[1]
-
-            # 生成文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"image_{timestamp}{file_ext}"
-
-            # 构建保存路径
-            assets_path = Path.cwd() / settings.GITHUB_REPO / "assets"
-            assets_path.mkdir(parents=True, exist_ok=True)
-            file_path = assets_path / filename
-
-            # 下载文件
-            await file.download_to_drive(file_path)
-
-            # 生成 LogSeq 格式的引用
-            media_ref = f"![{filename}](/assets/{filename})"
-
-            # 添加到日志
-            path = await self.journal_service.add_entry(media_ref)
-            if not path:
-                raise Exception("添加日志条目失败")
-
-            # 提交文件和日志
-            # 1. 提交文件
-            with open(file_path, "rb") as f:
-                file_content = f.read()
-            await self.github_service.commit_and_push(
-                message=f"添加媒体文件: {filename}",
-                path=f"assets/{filename}",
-                content=file_content,
-                is_binary=True,
-            )
-
-            # 2. 提交日志
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read()
-            relative_path = str(path.relative_to(Path.cwd() / settings.GITHUB_REPO))
-            await self.github_service.commit_and_push(
-                message="更新日志", path=relative_path, content=content
-            )
+        # 相册中的图片先收集，窗口结束后合并处理
+        if update.message.media_group_id:
+            await self._handle_album(update.message, context)
+            return
 
+        try:
+            await self._save_media(update.message)
             await update.message.reply_text("媒体文件已保存")
 
         except Exception as e:
@@ -174,53 +175,133 @@ class MessageHandler:
     ) -> None:
         """处理图片消息"""
         try:
-            # 获取最大尺寸的图片
-            photo = update.message.photo[-1]
-
-            # 下载图片
-            file = await context.bot.get_file(photo.file_id)
-
-            # 生成文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"image_{timestamp}.jpg"
-
-            # 构建保存路径
-            assets_path = Path.cwd() / settings.GITHUB_REPO / "assets"
-            assets_path.mkdir(parents=True, exist_ok=True)
-            file_path = assets_path / filename
-
-            # 保存图片
-            await file.download_to_drive(file_path)
+            await self._save_media(update.message)
+            await update.message.reply_text("图片已保存")
 
-            # 生成 LogSeq 格式的图片引用
-            image_ref = f"![{filename}](../assets/{filename})"
+        except Exception as e:
+            logger.error(f"处理图片失败: {e}")
+            await update.message.reply_text(f"保存图片失败: {str(e)}")
 
-            # 添加到日志
-            path = await self.journal_service.add_entry(image_ref)
+    async def _save_media(self, message: Message) -> None:
+        """保存媒体文件，添加日志引用并提交
+
+        重复的媒体（相同 file_unique_id 或相同内容）复用已有资源，不再上传。
+        """
+        media = await self.media_service.store(message)
+        if not media:
+            raise Exception("不支持的媒体类型")
+
+        # 1. 提交新文件（含缩略图），成功后才记录到媒体索引
+        if media.is_new:
+            uploads = [(media.filename, media.content)]
+            if media.thumbnail:
+                uploads.append((media.thumbnail, media.thumbnail_content))
+            for filename, file_content in uploads:
+                success = await self.github_service.commit_and_push(
+                    message=f"添加媒体文件: {filename}",
+                    path=f"assets/{filename}",
+                    content=file_content,
+                    is_binary=True,
+                )
+                if not success:
+                    raise Exception(f"上传媒体文件失败: {filename}")
+            self.media_service.confirm(media)
+
+        # 2. 添加到日志并提交
+        await self._add_journal_entry(self.media_service.get_media_url(media))
+
+    async def _add_journal_entry(
+        self,
+        entry: str,
+        extra_files: Optional[Dict[str, str | bytes]] = None,
+        commit_message: str = "更新日志",
+    ) -> bool:
+        """追加日志条目并提交
+
+        追加 -> 读取快照 -> 入队 在日志文件锁内完成，网络提交在锁外进行；
+        提交队列按文件串行推送并合并排队中的快照，不会推送过期快照。
+
+        Args:
+            entry: 日志条目内容
+            extra_files: 需要在同一次提交中推送的其他文件
+            commit_message: 提交信息
+
+        Returns:
+            是否提交成功
+        """
+        async with file_locks.path_lock(self.journal_service.get_journal_path()):
+            path = await self.journal_service.add_entry(entry)
             if not path:
                 raise Exception("添加日志条目失败")
 
-            # 提交图片和日志
-            # 1. 提交图片
-            with open(file_path, "rb") as f:
-                image_content = f.read()
-            await self.github_service.commit_and_push(
-                message=f"添加图片: {filename}",
-                path=f"assets/{filename}",
-                content=image_content,
-                is_binary=True,
-            )
-
-            # 2. 提交日志
             with open(path, "r", encoding="utf-8") as f:
                 content = f.read()
-            relative_path = str(path.relative_to(Path.cwd() / settings.GITHUB_REPO))
-            await self.github_service.commit_and_push(
-                message="更新日志", path=relative_path, content=content
+            relative_path = path.relative_to(Path.cwd() / settings.GITHUB_REPO)
+            relative_path = relative_path.as_posix()
+            committed = commit_queue.submit(
+                relative_path,
+                commit_message,
+                {**(extra_files or {}), relative_path: content},
             )
 
-            await update.message.reply_text("图片已保存")
+        return await committed
+
+    async def _handle_album(
+        self, message: Message, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """把相册中的消息加入收集窗口，第一条消息负责合并写入
+
+        相册消息不进入聊天通道，第一条消息在这里按到达顺序占用通道，
+        直到整个相册写入完成，之后的消息不会先于相册写入日志。
+        """
+        key = f"{message.chat_id}:{message.media_group_id}"
+        if key in self._albums:
+            self._albums[key].append(message)
+            return
+        self._albums[key] = [message]
+
+        processor = context.application.update_processor
+        if isinstance(processor, ChatLaneUpdateProcessor):
+            lane = processor.lane(message.chat_id)
+        else:
+            lane = nullcontext()
+        async with lane:
+            await self._flush_album(key)
+
+    async def _flush_album(self, key: str) -> None:
+        """收集窗口结束后，把整个相册写成一条日志并一次提交"""
+        await asyncio.sleep(settings.MEDIA_GROUP_WINDOW)
+        album = sorted(self._albums.pop(key), key=lambda m: m.message_id)
+
+        try:
+            results = await asyncio.gather(
+                *(self.media_service.store(message) for message in album)
+            )
+            medias = [media for media in results if media]
+            if not medias:
+                raise Exception("不支持的媒体类型")
+
+            # 新文件与日志合并为一次提交
+            files: Dict[str, str | bytes] = {}
+            for media in medias:
+                if media.is_new:
+                    files[f"assets/{media.filename}"] = media.content
+                    if media.thumbnail:
+                        files[f"assets/{media.thumbnail}"] = media.thumbnail_content
+
+            media_refs = " ".join(self.media_service.get_media_url(m) for m in medias)
+            success = await self._add_journal_entry(
+                media_refs,
+                extra_files=files,
+                commit_message=f"添加相册: {len(medias)} 个媒体文件",
+            )
+            if success:
+                for media in medias:
+                    self.media_service.confirm(media)
+                await album[-1].reply_text(f"相册已保存，共 {len(medias)} 个媒体文件")
+            else:
+                await album[-1].reply_text("提交到 GitHub 失败")
 
         except Exception as e:
-            logger.error(f"处理图片失败: {e}")
-            await update.message.reply_text(f"保存图片失败: {str(e)}")
+            logger.error(f"处理相册失败: {e}")
+            await album[-1].reply_text(f"保存相册失败: {str(e)}")
@@ -1,54 +1,161 @@
-from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, filters
+import time
+
+# 记录模块导入耗时
+_IMPORT_STARTED = time.perf_counter()
+
+from telegram.ext import (
+    Application,
+    ApplicationBuilder,
+    CallbackQueryHandler,
+    CommandHandler,
+    MessageHandler,
+    filters,
+)
 from loguru import logger
 import nest_asyncio
 import asyncio
 
 from .config.settings import settings
+from .bot.persistence import SqlitePersistence
+from .bot.update_processor import ChatLaneUpdateProcessor
+from .bot.webhook import run_webhook
+from .handlers.callbacks import handle_backlinks_callback, handle_todo_callback
 from .handlers.messages import MessageHandler as MsgHandler
 from .services.calendar import CalendarService
+from .services.commit_queue import commit_queue
+from .services.container import services
+from .services.graph_index import graph_indexes
+from .utils.locks import file_locks
+from .utils.metrics import instrument_handlers, metrics, start_metrics_server
+from .utils.web_utils import title_resolver, tweet_embedder
 from .handlers.commands import (
     start_command,
     help_command,
     pull_now_command,
     mindmap_command,
+    nsmap_command,
+    linkmap_command,
+    backlinks_command,
+    todo_command,
+    query_command,
     anno_command,
+    profile_command,
 )
 
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
 # 允许嵌套事件循环
 nest_asyncio.apply()
 
+# 后台任务引用（避免被垃圾回收）
+_background_tasks = set()
+
+
+async def post_init(application: Application) -> None:
+    """应用初始化完成后，在后台预热 GitHub 连接并加载图谱索引快照"""
+    for coro in (services.warm_up(), graph_indexes.ready()):
+        task = asyncio.create_task(coro)
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+
+async def post_shutdown(application: Application) -> None:
+    """应用关闭后释放各服务持有的 HTTP 会话"""
+    for close in (services.close, title_resolver.close, tweet_embedder.close):
+        try:
+            await close()
+        except Exception as e:
+            logger.warning(f"关闭 HTTP 会话失败: {e}")
+
+
+def register_handlers(application: Application) -> MsgHandler:
+    """注册命令和消息处理器
+
+    Args:
+        application: 机器人应用
+
+    Returns:
+        消息处理器实例
+    """
+    # 注册命令处理器
+    application.add_handler(CommandHandler("start", start_command))
+    application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("pull", pull_now_command))
+    application.add_handler(CommandHandler("mindmap", mindmap_command))
+    application.add_handler(CommandHandler("nsmap", nsmap_command))
+    application.add_handler(CommandHandler("linkmap", linkmap_command))
+    application.add_handler(CommandHandler("backlinks", backlinks_command))
+    application.add_handler(CommandHandler("todo", todo_command))
+    application.add_handler(CommandHandler("query", query_command))
+    application.add_handler(CommandHandler("anno", anno_command))
+    application.add_handler(CommandHandler("profile", profile_command))
+
+    # 注册消息处理器
+    message_handler = MsgHandler()
+    application.add_handler(
+        MessageHandler(filters.TEXT & ~filters.COMMAND, message_handler.handle_text)
+    )
+    application.add_handler(
+        MessageHandler(
+            filters.PHOTO | filters.Document.ALL, message_handler.handle_media
+        )
+    )
+
+    # 注册回调查询处理器
+    application.add_handler(
+        CallbackQueryHandler(handle_backlinks_callback, pattern=r"^backlinks:")
+    )
+    application.add_handler(
+        CallbackQueryHandler(handle_todo_callback, pattern=r"^todo:")
+    )
+    return message_handler
+
 
 async def start():
     """启动机器人"""
+    started = time.perf_counter()
+    logger.info(f"模块导入耗时: {IMPORT_SECONDS * 1000:.0f} ms")
     try:
         # 初始化服务
         calendar_service = CalendarService()
         await calendar_service.generate_calendar()
 
-        # 创建应用
-        application = ApplicationBuilder().token(settings.BOT_TOKEN).build()
-
-        # 注册命令处理器
-        application.add_handler(CommandHandler("start", start_command))
-        application.add_handler(CommandHandler("help", help_command))
-        application.add_handler(CommandHandler("pull", pull_now_command))
-        application.add_handler(CommandHandler("mindmap", mindmap_command))
-        application.add_handler(CommandHandler("anno", anno_command))
-
-        # 注册消息处理器
-        message_handler = MsgHandler()
-        application.add_handler(
-            MessageHandler(filters.TEXT & ~filters.COMMAND, message_handler.handle_text)
+        # 创建应用（首次启动时自动迁移旧的 PicklePersistence 文件 "persistence"）
+        persistence = SqlitePersistence(
+            filepath="persistence.sqlite3", legacy_pickle="persistence"
         )
-        application.add_handler(
-            MessageHandler(
-                filters.PHOTO | filters.Document.ALL, message_handler.handle_media
+        application = (
+            ApplicationBuilder()
+            .token(settings.BOT_TOKEN)
+            .persistence(persistence)
+            .concurrent_updates(
+                ChatLaneUpdateProcessor(settings.BOT_CONCURRENT_UPDATES)
             )
+            .post_init(post_init)
+            .post_shutdown(post_shutdown)
+            .build()
         )
 
+        message_handler = register_handlers(application)
+
+        # 处理器耗时统计与队列深度指标
+        instrument_handlers(application)
+        metrics.gauge("lupin_update_queue_depth", application.update_queue.qsize)
+        metrics.gauge("lupin_pending_albums", lambda: len(message_handler._albums))
+        metrics.gauge("lupin_file_locks_held", lambda: len(file_locks))
+        metrics.gauge("lupin_commit_queue_depth", lambda: len(commit_queue))
+
         # 启动机器人
-        logger.info("正在启动 Lupin Bot...")
-        await application.run_polling()
+        startup_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"正在启动 Lupin Bot... (启动耗时 {startup_ms:.0f} ms)")
+        if settings.BOT_MODE == "webhook":
+            await run_webhook(application)
+        else:
+            if settings.METRICS_ENABLED:
+                await start_metrics_server(
+                    settings.METRICS_LISTEN, settings.METRICS_PORT
+                )
+            await application.run_polling()
 
     except Exception as e:
         logger.error(f"启动失败: {e}")
@@ -0,0 +1,128 @@
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..utils.text_utils import TextUtils
+from .graph_index import GraphIndex, graph_indexes
+from .page_index import PageIndexService
+
+
+class BacklinkIndexService(GraphIndex):
+    """反向链接索引
+
+    记录每个页面被哪些块通过 [[引用]] 或 #标签 引用，
+    查询时直接读取倒排表，无需扫描图谱。
+    """
+
+    NAME = "backlink_index"
+    VERSION = 2
+
+    # 索引中保存的块文本最大长度
+    MAX_BLOCK_LENGTH = 200
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 持久化状态: 相对路径 -> {"page": 页面名, "blocks": [[行号, 块文本, [引用]]]}
+        self.files: Dict[str, dict] = {}
+        # 派生状态: 规范化页面名 -> {相对路径: [块序号]}
+        self.refs: Dict[str, Dict[str, List[int]]] = {}
+
+    @classmethod
+    def _parse_blocks(cls, page: str, content: str) -> List[list]:
+        """解析包含引用的块（按行）"""
+        lines = content.split("\n")
+        # 每行起始偏移，用于把记号位置映射回行号
+        offsets = [0, *accumulate(len(line) + 1 for line in lines)]
+        own_key = PageIndexService.normalize(page)
+
+        targets: Dict[int, List[str]] = {}
+        for token in TextUtils.tokenize(content):
+            if token.kind not in ("ref", "tag"):
+                continue
+            target = token.value.strip()
+            if not target or PageIndexService.normalize(target) == own_key:
+                continue
+            line_no = bisect_right(offsets, token.start) - 1
+            line_targets = targets.setdefault(line_no, [])
+            if target not in line_targets:
+                line_targets.append(target)
+
+        blocks = []
+        for line_no, line_targets in sorted(targets.items()):
+            text = lines[line_no].strip()
+            if text.startswith("- "):
+                text = text[2:]
+            blocks.append([line_no, text[: cls.MAX_BLOCK_LENGTH], line_targets])
+        return blocks
+
+    def _parse_file(self, rel_path: str, content: str) -> Optional[dict]:
+        """解析单个文件，没有引用时返回 None"""
+        page = self.page_name_for(rel_path, content)
+        blocks = self._parse_blocks(page, content)
+        return {"page": page, "blocks": blocks} if blocks else None
+
+    def _add_file(self, rel_path: str, entry: dict) -> None:
+        """登记单个文件"""
+        self.files[rel_path] = entry
+        self._add_refs(rel_path, entry["blocks"])
+
+    def _remove_file(self, rel_path: str) -> None:
+        """从索引中移除文件"""
+        entry = self.files.pop(rel_path, None)
+        if not entry:
+            return
+        for _, _, targets in entry["blocks"]:
+            for target in targets:
+                key = PageIndexService.normalize(target)
+                sources = self.refs.get(key)
+                if sources is None:
+                    continue
+                sources.pop(rel_path, None)
+                if not sources:
+                    del self.refs[key]
+
+    def _dump_state(self) -> dict:
+        return {"files": self.files}
+
+    def _load_state(self, state: dict) -> None:
+        self.files = state.get("files", {})
+        self.refs = {}
+        for rel_path, entry in self.files.items():
+            self._add_refs(rel_path, entry["blocks"])
+
+    def _add_refs(self, rel_path: str, blocks: List[list]) -> None:
+        """登记块到被引用页面的倒排项"""
+        for i, (_, _, targets) in enumerate(blocks):
+            for target in targets:
+                key = PageIndexService.normalize(target)
+                indexes = self.refs.setdefault(key, {}).setdefault(rel_path, [])
+                if not indexes or indexes[-1] != i:
+                    indexes.append(i)
+
+    def backlinks(self, names: Iterable[str]) -> List[Tuple[str, str]]:
+        """查询引用了指定页面（含别名）的块
+
+        Args:
+            names: 页面名及其别名
+
+        Returns:
+            [(来源页面名, 块文本), ...]，按来源页面和行号排序
+        """
+        self.ensure_loaded()
+        hits: Dict[str, Set[int]] = {}
+        for name in names:
+            for rel_path, indexes in self.refs.get(
+                PageIndexService.normalize(name), {}
+            ).items():
+                hits.setdefault(rel_path, set()).update(indexes)
+
+        results = []
+        for rel_path in sorted(hits, key=lambda p: self.files[p]["page"].casefold()):
+            entry = self.files[rel_path]
+            for i in sorted(hits[rel_path]):
+                results.append((entry["page"], entry["blocks"][i][1]))
+        return results
+
+
+# 全局反向链接索引
+backlink_index = graph_indexes.register(BacklinkIndexService())
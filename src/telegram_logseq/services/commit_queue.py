@@ -0,0 +1,83 @@
+from typing import Dict, List
+from loguru import logger
+import asyncio
+
+from .container import services
+
+
+class CommitQueue:
+    """按文件排队的提交队列
+
+    追加 -> 读取快照 在文件锁内完成，快照入队后即可释放锁，网络提交在锁外进行。
+    同一文件同一时间只有一个提交在进行；提交期间入队的快照合并为一次提交，
+    较新的快照包含之前所有追加，因此只推送最新内容，远端不会被旧快照覆盖。
+    """
+
+    def __init__(self):
+        # 键 -> {"messages": [提交信息], "files": {路径: 内容}, "waiters": [Future]}
+        self._pending: Dict[str, dict] = {}
+        # 正在提交的键
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def submit(
+        self, key: str, message: str, files: Dict[str, str | bytes]
+    ) -> "asyncio.Future[bool]":
+        """提交快照（不等待，应在文件锁内调用以保证入队顺序）
+
+        Args:
+            key: 排队的键（通常是主文件的相对路径）
+            message: 提交信息
+            files: 文件路径 -> 内容，bytes 视为二进制文件
+
+        Returns:
+            提交结果（是否成功）
+        """
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(
+            key, {"messages": [], "files": {}, "waiters": []}
+        )
+        if message not in pending["messages"]:
+            pending["messages"].append(message)
+        pending["files"].update(files)
+        pending["waiters"].append(future)
+
+        if key not in self._running:
+            self._running[key] = asyncio.create_task(self._drain(key))
+        return future
+
+    async def _drain(self, key: str) -> None:
+        """依次提交排队中的快照，直到队列为空"""
+        try:
+            while key in self._pending:
+                pending = self._pending.pop(key)
+                success = await self._commit(pending["messages"], pending["files"])
+                for waiter in pending["waiters"]:
+                    if not waiter.done():
+                        waiter.set_result(success)
+        finally:
+            del self._running[key]
+
+    @staticmethod
+    async def _commit(messages: List[str], files: Dict[str, str | bytes]) -> bool:
+        """推送合并后的快照"""
+        message = "\n".join(messages)
+        try:
+            if len(files) == 1:
+                ((path, content),) = files.items()
+                return await services.github.commit_and_push(
+                    message=message,
+                    path=path,
+                    content=content,
+                    is_binary=isinstance(content, bytes),
+                )
+            return await services.github.commit_files(message=message, files=files)
+        except Exception as e:
+            logger.error(f"提交失败: {e}")
+            return False
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._running)
+
+
+# 全局提交队列
+commit_queue = CommitQueue()
@@ -0,0 +1,82 @@
+from typing import Any, Callable, Dict, TYPE_CHECKING
+from loguru import logger
+import asyncio
+import time
+
+if TYPE_CHECKING:
+    from .github import GitHubService
+    from .hypothesis import HypothesisService
+    from .journal import JournalService
+    from .media import MediaService
+    from .mindmap import MindmapService
+
+
+class ServiceContainer:
+    """服务容器
+
+    服务在首次访问时才导入并创建，所有处理器共享同一个实例
+    （例如只有一个 GitHub 客户端）。
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        """获取或创建服务实例"""
+        if name not in self._instances:
+            started = time.perf_counter()
+            self._instances[name] = factory()
+            logger.debug(
+                f"创建服务 {name}: {(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+        return self._instances[name]
+
+    @property
+    def github(self) -> "GitHubService":
+        from .github import GitHubService
+
+        return self._get("github", GitHubService)
+
+    @property
+    def journal(self) -> "JournalService":
+        from .journal import JournalService
+
+        return self._get("journal", JournalService)
+
+    @property
+    def media(self) -> "MediaService":
+        from .media import MediaService
+
+        return self._get("media", MediaService)
+
+    @property
+    def mindmap(self) -> "MindmapService":
+        from .mindmap import MindmapService
+
+        return self._get("mindmap", MindmapService)
+
+    @property
+    def hypothesis(self) -> "HypothesisService":
+        from .hypothesis import HypothesisService
+
+        return self._get("hypothesis", HypothesisService)
+
+    async def warm_up(self) -> None:
+        """在后台预先连接 GitHub，失败时留待首次使用再重试"""
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(lambda: self.github.repo)
+            logger.info(
+                f"GitHub 预热完成: {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+        except Exception as e:
+            logger.warning(f"GitHub 预热失败，将在首次使用时重试: {e}")
+
+    async def close(self) -> None:
+        """关闭已创建的服务持有的 HTTP 会话（不会为此创建服务）"""
+        if "hypothesis" in self._instances:
+            await self._instances["hypothesis"].close()
+
+
+# 全局服务容器
+services = ServiceContainer()
@@ -60,7 +60,7 @@ class FlashcardService:
             if "title:" in line.lower():
                 source = line.strip()
 
-            if settings.FLASHCARDS_TAG in line:
+            if settings.FLASHCARD_TAG in line:
                 card_indent = cls._count_indent(line)
                 is_sub = True
                 i += 1
@@ -89,6 +89,19 @@ class FlashcardService:
                     cards.append(card)
             i += 1
 
+    @staticmethod
+    def _count_indent(line: str) -> int:
+        """计算行首的制表符缩进数"""
+        return len(line) - len(line.lstrip("\t"))
+
+    @staticmethod
+    def _process_answer(line: str, indent: int) -> str:
+        """去掉答案行的缩进和列表符号"""
+        answer = line[indent:].strip()
+        if answer.startswith("- "):
+            answer = answer[2:]
+        return answer
+
     @classmethod
     def save_flashcards_db(
         cls, flashcard_list: List[Flashcard], force: bool = False
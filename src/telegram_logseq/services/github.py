@@ -1,37 +1,63 @@
-from github import Github, InputGitAuthor
-from git import Repo
+from github import Github, GithubException, InputGitAuthor, InputGitTreeElement
 from loguru import logger
 from pathlib import Path
+from typing import Dict
+import asyncio
 import base64
 
 from ..config.settings import settings
+from ..utils.metrics import metrics
+from .graph_index import graph_indexes
 
 
 class GitHubService:
-    """GitHub 服务类"""
+    """GitHub 服务类
+
+    构造时不发起网络请求，仓库对象在首次使用时获取（或由启动后的后台预热获取）。
+    PyGithub 是同步库，每次操作的请求序列都放到线程池中执行，
+    慢提交不会阻塞事件循环和其他聊天。
+    """
+
+    # 分支头被并发提交移动时的重试次数
+    COMMIT_RETRIES = 3
 
     def __init__(self):
         """初始化服务"""
-        try:
-            # 初始化 GitHub API
-            self.g = Github(settings.GITHUB_TOKEN)
-            self.repo = self.g.get_repo(
-                f"{settings.GITHUB_USER}/{settings.GITHUB_REPO}"
-            )
-            self.author = InputGitAuthor(settings.GITHUB_AUTHOR, settings.GITHUB_EMAIL)
-            logger.info(
-                f"Git 仓库初始化成功: {settings.GITHUB_USER}/{settings.GITHUB_REPO}"
-            )
-        except Exception as e:
-            logger.error(f"初始化 Git 仓库失败: {e}")
-            raise
+        # 初始化 GitHub API（不访问网络）
+        self.g = Github(settings.GITHUB_TOKEN)
+        self.author = InputGitAuthor(settings.GITHUB_AUTHOR, settings.GITHUB_EMAIL)
+        self._repo = None
+
+    @property
+    def repo(self):
+        """GitHub 仓库对象，首次访问时连接"""
+        if self._repo is None:
+            try:
+                self._repo = self.g.get_repo(
+                    f"{settings.GITHUB_USER}/{settings.GITHUB_REPO}"
+                )
+                logger.info(
+                    f"Git 仓库初始化成功: {settings.GITHUB_USER}/{settings.GITHUB_REPO}"
+                )
+            except Exception as e:
+                logger.error(f"初始化 Git 仓库失败: {e}")
+                raise
+        return self._repo
 
+    @metrics.timed("github", "pull")
     async def pull(self) -> bool:
-        """从 GitHub 拉取最新内容
+        """从 GitHub 拉取最新内容，并刷新图谱索引
 
         Returns:
             是否成功
         """
+        success = await asyncio.to_thread(self._pull)
+        if success:
+            await graph_indexes.refresh()
+        return success
+
+    def _pull(self) -> bool:
+        """拉取（在线程池中执行）"""
         try:
             # 获取所有文件
             contents = self.repo.get_contents("", ref=settings.GITHUB_BRANCH)
@@ -76,6 +102,7 @@ class GitHubService:
             logger.error(f"拉取失败: {e}")
             return False
 
+    @metrics.timed("github", "commit_and_push")
     async def commit_and_push(
         self, message: str, path: str, content: str | bytes, is_binary: bool = False
     ) -> bool:
@@ -90,6 +117,14 @@ class GitHubService:
         Returns:
             是否成功
         """
+        return await asyncio.to_thread(
+            self._commit_and_push, message, path, content, is_binary
+        )
+
+    def _commit_and_push(
+        self, message: str, path: str, content: str | bytes, is_binary: bool
+    ) -> bool:
+        """提交单个文件（在线程池中执行）"""
         try:
             # 获取文件
             try:
@@ -123,3 +158,61 @@ class GitHubService:
         except Exception as e:
             logger.error(f"提交失败: {e}")
             return False
+
+    @metrics.timed("github", "commit_files")
+    async def commit_files(self, message: str, files: Dict[str, str | bytes]) -> bool:
+        """把多个文件作为一次提交推送（Git Data API）
+
+        Args:
+            message: 提交信息
+            files: 文件路径 -> 内容，bytes 视为二进制文件
+
+        Returns:
+            是否成功
+        """
+        return await asyncio.to_thread(self._commit_files, message, files)
+
+    def _commit_files(self, message: str, files: Dict[str, str | bytes]) -> bool:
+        """提交多个文件（在线程池中执行）
+
+        分支头在建树和更新引用之间被其他提交移动时（非快进，422），
+        在新的分支头上重新建树和提交，最多重试 COMMIT_RETRIES 次。
+        """
+        try:
+            elements = []
+            for path, content in files.items():
+                if isinstance(content, bytes):
+                    blob = self.repo.create_git_blob(
+                        base64.b64encode(content).decode(), "base64"
+                    )
+                else:
+                    blob = self.repo.create_git_blob(content, "utf-8")
+                elements.append(
+                    InputGitTreeElement(path, "100644", "blob", sha=blob.sha)
+                )
+
+            for attempt in range(self.COMMIT_RETRIES + 1):
+                ref = self.repo.get_git_ref(f"heads/{settings.GITHUB_BRANCH}")
+                base_commit = self.repo.get_git_commit(ref.object.sha)
+                tree = self.repo.create_git_tree(elements, base_commit.tree)
+                commit = self.repo.create_git_commit(
+                    message,
+                    tree,
+                    [base_commit],
+                    author=self.author,
+                    committer=self.author,
+                )
+                try:
+                    ref.edit(commit.sha)
+                    break
+                except GithubException as e:
+                    if e.status != 422 or attempt == self.COMMIT_RETRIES:
+                        raise
+                    logger.warning(f"分支头已移动，在新的分支头上重试提交: {e}")
+
+            logger.info(f"提交成功: {len(files)} 个文件")
+            return True
+
+        except Exception as e:
+            logger.error(f"提交失败: {e}")
+            return False
@@ -0,0 +1,687 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, List, Optional, Set, Tuple
+from loguru import logger
+import asyncio
+import gc
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+from ..config.settings import settings
+from ..utils.text_utils import TextUtils
+
+# 扫描结果: 相对路径 -> (绝对路径, 指纹)
+Scan = Dict[str, Tuple[Path, List[int]]]
+# 单个文件的解析结果: (相对路径, 指纹, 文件状态)
+# 指纹为 None 表示文件已删除，文件状态为 None 表示文件中没有需要索引的内容
+Change = Tuple[str, Optional[List[int]], Optional[dict]]
+
+# 分段编码/解码时逐个成员处理的对象层数（顶层、state、files）
+_SPLIT_DEPTH = 3
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+def _dumps(data: Any, depth: int = _SPLIT_DEPTH) -> str:
+    """紧凑 JSON 编码，前 depth 层对象逐个成员编码
+
+    json.dumps/json.loads 处理整个分段是一次很长的 C 调用，期间一直占用 GIL，
+    即使在线程中执行也会让事件循环停顿；逐个成员处理可以在成员之间切换线程。
+    """
+    if depth <= 0 or not isinstance(data, dict):
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    members = (
+        f"{_dumps(key, 0)}:{_dumps(value, depth - 1)}" for key, value in data.items()
+    )
+    return "{" + ",".join(members) + "}"
+
+
+def _loads(text: str, depth: int = _SPLIT_DEPTH) -> Any:
+    """解析 JSON，前 depth 层对象逐个成员解析（见 _dumps）"""
+    value, _ = _decode(text, _WHITESPACE_RE.match(text).end(), depth)
+    return value
+
+
+def _decode(text: str, pos: int, depth: int) -> Tuple[Any, int]:
+    """从 pos 开始解析一个值，返回 (值, 结束位置)"""
+    if depth <= 0 or text[pos] != "{":
+        return _DECODER.raw_decode(text, pos)
+    result = {}
+    pos = _WHITESPACE_RE.match(text, pos + 1).end()
+    if text[pos] == "}":
+        return result, pos + 1
+    while True:
+        key, pos = _DECODER.raw_decode(text, pos)
+        pos = _WHITESPACE_RE.match(text, pos).end()
+        if text[pos] != ":":
+            raise ValueError(f"JSON 格式不正确: 位置 {pos}")
+        pos = _WHITESPACE_RE.match(text, pos + 1).end()
+        result[key], pos = _decode(text, pos, depth - 1)
+        pos = _WHITESPACE_RE.match(text, pos).end()
+        if text[pos] == "}":
+            return result, pos + 1
+        if text[pos] != ",":
+            raise ValueError(f"JSON 格式不正确: 位置 {pos}")
+        pos = _WHITESPACE_RE.match(text, pos + 1).end()
+
+
+class IndexSnapshot:
+    """图谱索引快照
+
+    所有索引共用一个快照文件，每个索引占一个独立压缩的分段
+    （紧凑 JSON + zlib），内容为索引状态和逐文件指纹。
+    文件头记录各分段的偏移和长度，读取时把文件映射到内存（mmap），
+    按偏移切出用到的分段，不读取其他分段；分段本身不能部分读取，
+    读取时整段解压并解析 JSON，加载耗时与该索引的大小成正比。
+    保存时未变化的分段直接复制原始字节。
+
+    单个文件的变更不重写快照，而是向旁边的增量日志追加一行
+    [分段名, 相对路径, 指纹, 文件状态]，加载时在分段之上重放；
+    完整保存某个分段时（刷新、启动加载、日志过长）清除它的日志记录。
+    每条记录同时带有指纹和状态，重放旧记录最多导致该文件被重新解析。
+
+    写入（保存分段、追加日志）通过 submit 交给单独的写入线程按提交顺序执行。
+
+    文件格式: MAGIC | 文件头长度 (uint32 LE) | 文件头 JSON | 分段数据
+    """
+
+    FILE = "graph_index.snapshot"
+    MAGIC = b"LUPINIDX1\n"
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or self.FILE)
+        self.log_path = Path(f"{self.path}.log")
+        self._mmap: Optional[mmap.mmap] = None
+        # 分段名 -> (数据起始偏移, 长度)
+        self._sections: Dict[str, Tuple[int, int]] = {}
+        # 分段名 -> 增量日志记录 [相对路径, 指纹, 文件状态]
+        self._log: Dict[str, List[list]] = {}
+        self._opened = False
+        self._lock = threading.RLock()
+        # 写入线程（首次提交时启动），保证写入按提交顺序执行
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="index-snapshot"
+        )
+
+    def _open(self) -> None:
+        """映射快照文件并读取文件头"""
+        if self._opened:
+            return
+        self._opened = True
+        self._sections = {}
+        self._log = self._read_log()
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._mmap[: len(self.MAGIC)] != self.MAGIC:
+                raise ValueError("文件格式不正确")
+            start = len(self.MAGIC)
+            (header_length,) = struct.unpack_from("<I", self._mmap, start)
+            start += 4
+            header = json.loads(self._mmap[start : start + header_length])
+            data_start = start + header_length
+            self._sections = {
+                name: (data_start + offset, length)
+                for name, (offset, length) in header["sections"].items()
+            }
+        except Exception as e:
+            logger.error(f"读取索引快照失败 {self.path}: {e}")
+            self._close()
+            self._sections = {}
+
+    def _read_log(self) -> Dict[str, List[list]]:
+        """读取增量日志（跳过写入中断的残行）"""
+        log: Dict[str, List[list]] = {}
+        if not self.log_path.exists():
+            return log
+        with open(self.log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    name, *record = json.loads(line)
+                except ValueError:
+                    continue
+                log.setdefault(name, []).append(record)
+        return log
+
+    def _close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """在写入线程中执行写入操作（按提交顺序，不阻塞调用方）"""
+        future = self._writer.submit(fn, *args)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future: Future) -> None:
+        if future.exception() is not None:
+            logger.error(f"写入索引快照失败: {future.exception()}")
+
+    def read(self, name: str) -> Optional[dict]:
+        """读取分段（整段解压并解析），不存在时返回 None"""
+        with self._lock:
+            self._open()
+            if name not in self._sections:
+                return None
+            offset, length = self._sections[name]
+            raw = self._mmap[offset : offset + length]
+        try:
+            return _loads(zlib.decompress(raw).decode())
+        except Exception as e:
+            logger.error(f"解析索引快照分段失败 {name}: {e}")
+            return None
+
+    def log_records(self, name: str) -> List[list]:
+        """分段的增量日志记录 [相对路径, 指纹, 文件状态]"""
+        with self._lock:
+            self._open()
+            return list(self._log.get(name, []))
+
+    def append(
+        self,
+        name: str,
+        rel_path: str,
+        fingerprint: Optional[List[int]],
+        entry: Optional[dict],
+    ) -> None:
+        """向增量日志追加单个文件的变更"""
+        line = json.dumps(
+            [name, rel_path, fingerprint, entry],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        with self._lock:
+            self._open()
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._log.setdefault(name, []).append([rel_path, fingerprint, entry])
+
+    def write(self, sections: Dict[str, dict]) -> None:
+        """保存分段（多个分段合并为一次写入），并清除它们的日志记录"""
+        pending = {
+            name: zlib.compress(_dumps(data).encode())
+            for name, data in sections.items()
+        }
+        with self._lock:
+            self._flush(pending)
+
+    def _compact_log(self, saved: set) -> None:
+        """从增量日志中去掉已完整保存的分段"""
+        rest = [
+            json.dumps([name, *record], ensure_ascii=False, separators=(",", ":"))
+            for name, records in self._log.items()
+            if name not in saved
+            for record in records
+        ]
+        if not rest:
+            self.log_path.unlink(missing_ok=True)
+            return
+        tmp_path = Path(f"{self.log_path}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in rest))
+        os.replace(tmp_path, self.log_path)
+
+    def _flush(self, pending: Dict[str, bytes]) -> None:
+        """保存快照（先写临时文件再替换，避免写坏）"""
+        if not pending:
+            return
+        self._open()
+        names = sorted(set(self._sections) | set(pending))
+        chunks = []
+        for name in names:
+            if name in pending:
+                chunks.append(pending[name])
+            else:
+                offset, length = self._sections[name]
+                chunks.append(self._mmap[offset : offset + length])
+
+        sections, offset = {}, 0
+        for name, chunk in zip(names, chunks):
+            sections[name] = [offset, len(chunk)]
+            offset += len(chunk)
+        header = json.dumps({"sections": sections}).encode()
+
+        try:
+            tmp_path = Path(f"{self.path}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(self.MAGIC)
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                for chunk in chunks:
+                    f.write(chunk)
+            self._close()
+            os.replace(tmp_path, self.path)
+            self._compact_log(set(pending))
+        except Exception as e:
+            logger.error(f"保存索引快照失败 {self.path}: {e}")
+        finally:
+            # 下次读取时重新映射新文件
+            self._close()
+            self._opened = False
+
+
+class GraphIndex:
+    """图谱索引基类
+
+    按文件指纹 (mtime_ns, size) 增量维护，只重新解析发生变化的文件。
+    子类实现 _parse_file / _add_file / _remove_file / _dump_state / _load_state，
+    持久化状态的格式为 {"files": {相对路径: 文件状态}}，文件状态创建后不再修改。
+    注册后状态和指纹保存在注册表共用的快照中，修改解析逻辑时递增 VERSION。
+
+    加载完成后索引只在事件循环中读写，不需要锁：_parse_file 不访问索引状态，
+    可以在线程池中执行，解析结果再回到事件循环中应用；保存快照时只在
+    事件循环中做浅拷贝，序列化和写入由快照的写入线程完成。
+    """
+
+    NAME = ""
+    VERSION = 1
+
+    # 增量日志超过该记录数时完整保存一次分段
+    COMPACT_AFTER = 500
+
+    def __init__(self, repo_path: Optional[Path] = None):
+        """初始化索引"""
+        self.repo_path = repo_path or Path.cwd() / settings.GITHUB_REPO
+        self.fingerprints: Dict[str, List[int]] = {}
+        self.snapshot: Optional[IndexSnapshot] = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        # 上次完整保存后追加的日志记录数
+        self._log_size = 0
+
+    # ---- 子类钩子 ----
+
+    def _parse_file(self, rel_path: str, content: str) -> Optional[dict]:
+        """解析单个文件，返回文件状态（不访问索引状态，可在线程池中执行）"""
+        raise NotImplementedError
+
+    def _add_file(self, rel_path: str, entry: dict) -> None:
+        """把文件状态登记到索引"""
+        raise NotImplementedError
+
+    def _remove_file(self, rel_path: str) -> None:
+        """从索引中移除文件"""
+        raise NotImplementedError
+
+    def _dump_state(self) -> dict:
+        """导出可持久化的索引状态"""
+        raise NotImplementedError
+
+    def _load_state(self, state: dict) -> None:
+        """从持久化状态恢复索引"""
+        raise NotImplementedError
+
+    def _dump_file(self, rel_path: str) -> Optional[dict]:
+        """导出单个文件的持久化状态（写入增量日志）"""
+        return self._dump_state().get("files", {}).get(rel_path)
+
+    # ---- 公共接口 ----
+
+    @staticmethod
+    def page_name_for(rel_path: str, content: str) -> str:
+        """获取文件对应的页面名，优先使用 title:: 属性"""
+        for line in content.split("\n", 5)[:5]:
+            line = line.strip()
+            if line.lower().startswith("title::"):
+                return line.split("::", 1)[1].strip()
+        return TextUtils.page_name_from_filename(rel_path.rsplit("/", 1)[-1])
+
+    def graph_files(self) -> List[Path]:
+        """获取图谱中需要索引的文件"""
+        files = []
+        for folder in ("pages", settings.JOURNALS_FOLDER):
+            folder_path = self.repo_path / folder
+            if folder_path.is_dir():
+                files.extend(folder_path.rglob("*.md"))
+        return files
+
+    def relative_path(self, path: Path) -> Optional[str]:
+        """获取相对于仓库根目录的路径，不在仓库内则返回 None"""
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.repo_path / path
+        try:
+            return path.relative_to(self.repo_path).as_posix()
+        except ValueError:
+            return None
+
+    def scan(self) -> Scan:
+        """扫描图谱文件的指纹"""
+        return {
+            full_path.relative_to(self.repo_path).as_posix(): (
+                full_path,
+                self._fingerprint(full_path),
+            )
+            for full_path in self.graph_files()
+        }
+
+    def read_changes(self, scan: Scan, known: Dict[str, List[int]]) -> List[Change]:
+        """读取并解析指纹发生变化的文件（不修改索引，可在线程池中执行）
+
+        Args:
+            scan: 扫描结果
+            known: 索引中已有的文件指纹（事件循环中取得的副本）
+
+        Returns:
+            解析结果
+        """
+        changes: List[Change] = []
+        for rel_path, (full_path, fingerprint) in scan.items():
+            if known.get(rel_path) == fingerprint:
+                continue
+            try:
+                with open(full_path, "r", encoding="utf-8") as f:
+                    content = f.read()
+            except Exception as e:
+                logger.error(f"索引文件失败 {rel_path}: {e}")
+                continue
+            changes.append((rel_path, fingerprint, self._parse_file(rel_path, content)))
+
+        for rel_path in set(known) - set(scan):
+            changes.append((rel_path, None, None))
+        return changes
+
+    def apply(self, changes: List[Change], skip: Collection[str] = ()) -> int:
+        """把解析结果写入索引
+
+        Args:
+            changes: 解析结果
+            skip: 不应用的文件（解析期间已被单独更新，结果可能过期）
+
+        Returns:
+            应用的文件数量
+        """
+        applied = 0
+        for rel_path, fingerprint, entry in changes:
+            if rel_path in skip:
+                continue
+            self._remove_file(rel_path)
+            if fingerprint is None:
+                self.fingerprints.pop(rel_path, None)
+            else:
+                if entry is not None:
+                    self._add_file(rel_path, entry)
+                self.fingerprints[rel_path] = fingerprint
+            applied += 1
+        return applied
+
+    def ensure_loaded(self) -> None:
+        """首次使用时同步加载
+
+        机器人中由 graph_indexes.ready() 在线程池中加载，查询前已等待加载完成，
+        这里直接返回；只有未经过 ready() 的调用方（如脚本）会在这里加载。
+        """
+        if not self._loaded and self._load_once():
+            self.save()
+
+    def _load_once(self, scan: Optional[Scan] = None) -> bool:
+        """加载快照，并只重新索引离线期间变化的文件
+
+        Args:
+            scan: 已有的扫描结果（多个索引共用），为空时自行扫描
+
+        Returns:
+            是否需要保存快照
+        """
+        with self._load_lock:
+            if self._loaded:
+                return False
+            self.load()
+            if scan is None:
+                scan = self.scan()
+            changed = self.apply(self.read_changes(scan, self.fingerprints))
+            if changed:
+                logger.info(f"{self.__class__.__name__} 更新 {changed} 个文件")
+            self._loaded = True
+            return bool(changed or self._log_size)
+
+    def load(self) -> None:
+        """从快照加载索引，快照中没有时迁移旧的 JSON 索引文件"""
+        if self.snapshot is None:
+            return
+        data = self.snapshot.read(self.NAME)
+        legacy_path = Path(f"{self.NAME}.json")
+        migrated = False
+        if data is None and legacy_path.exists():
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                data["version"] = self.VERSION
+                migrated = True
+            except Exception as e:
+                logger.error(f"迁移索引失败 {legacy_path}: {e}")
+                data = None
+        if data is None or data.get("version") != self.VERSION:
+            return
+
+        try:
+            fingerprints = data.get("fingerprints", {})
+            state = data.get("state", {})
+            # 重放增量日志
+            files = state.setdefault("files", {})
+            records = self.snapshot.log_records(self.NAME)
+            for rel_path, fingerprint, entry in records:
+                if fingerprint is None:
+                    fingerprints.pop(rel_path, None)
+                else:
+                    fingerprints[rel_path] = fingerprint
+                if entry is None:
+                    files.pop(rel_path, None)
+                else:
+                    files[rel_path] = entry
+            self.fingerprints = fingerprints
+            self._load_state(state)
+            self._log_size = len(records)
+        except Exception as e:
+            logger.error(f"加载索引失败 {self.NAME}: {e}")
+            self.fingerprints = {}
+            self._load_state({})
+            return
+
+        if migrated:
+            self.save()
+            self.snapshot.submit(legacy_path.rename, f"{legacy_path}.migrated")
+            logger.info(f"已从 {legacy_path} 迁移索引")
+
+    def snapshot_data(self) -> dict:
+        """索引状态和指纹的浅拷贝（文件状态不再修改，可交给写入线程序列化）"""
+        return {
+            "version": self.VERSION,
+            "fingerprints": dict(self.fingerprints),
+            "state": {key: dict(value) for key, value in self._dump_state().items()},
+        }
+
+    def save(self) -> None:
+        """把索引状态和指纹写入快照"""
+        if self.snapshot is None:
+            return
+        self.snapshot.submit(self.snapshot.write, {self.NAME: self.snapshot_data()})
+        self._log_size = 0
+
+    def _save_file(self, rel_path: str) -> None:
+        """把单个文件的变更追加到增量日志，不重写整个快照"""
+        if self.snapshot is None:
+            return
+        self._log_size += 1
+        if self._log_size > self.COMPACT_AFTER:
+            self.save()
+            return
+        self.snapshot.submit(
+            self.snapshot.append,
+            self.NAME,
+            rel_path,
+            self.fingerprints.get(rel_path),
+            self._dump_file(rel_path),
+        )
+
+    @staticmethod
+    def _fingerprint(path: Path) -> List[int]:
+        """文件指纹"""
+        stat = path.stat()
+        return [stat.st_mtime_ns, stat.st_size]
+
+
+class GraphIndexRegistry:
+    """图谱索引注册表，把文件变更分发给所有索引，并管理共用的快照
+
+    启动加载整体在线程池中进行，查询和写入前先等待 ready()；
+    加载完成后索引归事件循环所有：读取、解析文件和写入快照在线程中进行，
+    解析结果在事件循环中应用（刷新时分段应用），事件循环上不等待线程锁。
+    """
+
+    # 刷新时每应用多少个文件让出一次事件循环
+    APPLY_CHUNK = 50
+
+    def __init__(self, snapshot: Optional[IndexSnapshot] = None):
+        self._indexes: List[GraphIndex] = []
+        self.snapshot = snapshot or IndexSnapshot()
+        self._loaded = False
+        self._loading: Optional[asyncio.Future] = None
+        # 拉取后的刷新依次进行；刷新期间被单独更新过的文件不再应用刷新结果
+        self._refreshing = asyncio.Lock()
+        self._touched: Set[str] = set()
+
+    def register(self, index: GraphIndex) -> GraphIndex:
+        """注册索引"""
+        index.snapshot = self.snapshot
+        self._indexes.append(index)
+        return index
+
+    def _scans(self) -> Dict[Path, Scan]:
+        """按仓库扫描一次文件指纹，供所有索引共用"""
+        scans: Dict[Path, Scan] = {}
+        for index in self._indexes:
+            if index.repo_path not in scans:
+                scans[index.repo_path] = index.scan()
+        return scans
+
+    def _save(self, indexes: List[GraphIndex]) -> None:
+        """把多个索引的分段合并为一次快照写入"""
+        sections = {}
+        for index in indexes:
+            sections[index.NAME] = index.snapshot_data()
+            index._log_size = 0
+        if sections:
+            self.snapshot.submit(self.snapshot.write, sections)
+
+    async def ready(self) -> None:
+        """等待索引加载完成，尚未开始时在线程池中开始加载"""
+        if self._loaded:
+            return
+        if self._loading is None or self._loading.done():
+            self._loading = asyncio.ensure_future(asyncio.to_thread(self._load_all))
+        await asyncio.shield(self._loading)
+        self._loaded = True
+
+    def _load_all(self) -> None:
+        """加载快照，只重新索引指纹发生变化的文件（在线程池中执行）"""
+        started = time.perf_counter()
+        scans = self._scans()
+        dirty = []
+        for index in self._indexes:
+            try:
+                if index._load_once(scans[index.repo_path]):
+                    dirty.append(index)
+            except Exception as e:
+                logger.error(f"加载索引失败 {index.__class__.__name__}: {e}")
+            # 索引对象数量大且长期存在，移出垃圾回收的跟踪范围：否则每次完整回收
+            # 都要遍历整个索引，回收期间占用 GIL，事件循环也会停顿
+            gc.freeze()
+        self._save(dirty)
+        elapsed = (time.perf_counter() - started) * 1000
+        logger.info(f"图谱索引加载完成: {len(self._indexes)} 个索引, {elapsed:.0f} ms")
+
+    async def file_changed(self, path: Path) -> None:
+        """通知文件已变更：在线程池中读取和解析，回到事件循环后更新索引
+
+        调用方应持有该文件的写入锁，同一文件的更新不会交错。
+        """
+        await self.ready()
+        targets = []
+        for index in self._indexes:
+            rel_path = index.relative_path(path)
+            if rel_path is not None and rel_path.endswith(".md"):
+                targets.append((index, rel_path, index.fingerprints.get(rel_path)))
+        if not targets:
+            return
+        if self._refreshing.locked():
+            self._touched.update(rel_path for _, rel_path, _ in targets)
+
+        changes = await asyncio.to_thread(self._read_file, targets)
+        for index, change in changes:
+            try:
+                if index.apply([change]):
+                    index._save_file(change[0])
+            except Exception as e:
+                logger.error(f"更新索引失败 {index.__class__.__name__}: {e}")
+
+    @staticmethod
+    def _read_file(
+        targets: List[Tuple[GraphIndex, str, Optional[List[int]]]],
+    ) -> List[Tuple[GraphIndex, Change]]:
+        """读取一次文件，按各索引解析（在线程池中执行）"""
+        contents: Dict[Path, Optional[str]] = {}
+        changes = []
+        for index, rel_path, known in targets:
+            full_path = index.repo_path / rel_path
+            if not full_path.exists():
+                if known is not None:
+                    changes.append((index, (rel_path, None, None)))
+                continue
+            fingerprint = index._fingerprint(full_path)
+            if fingerprint == known:
+                continue
+            try:
+                if full_path not in contents:
+                    with open(full_path, "r", encoding="utf-8") as f:
+                        contents[full_path] = f.read()
+                entry = index._parse_file(rel_path, contents[full_path])
+            except Exception as e:
+                logger.error(f"更新索引失败 {index.__class__.__name__}: {e}")
+                continue
+            changes.append((index, (rel_path, fingerprint, entry)))
+        return changes
+
+    async def refresh(self) -> None:
+        """刷新所有索引（拉取后调用）"""
+        await self.ready()
+        async with self._refreshing:
+            self._touched = set()
+            scans = await asyncio.to_thread(self._scans)
+            dirty = []
+            for index in self._indexes:
+                try:
+                    changes = await asyncio.to_thread(
+                        index.read_changes,
+                        scans[index.repo_path],
+                        dict(index.fingerprints),
+                    )
+                    changed = 0
+                    for start in range(0, len(changes), self.APPLY_CHUNK):
+                        if start:
+                            await asyncio.sleep(0)
+                        changed += index.apply(
+                            changes[start : start + self.APPLY_CHUNK], self._touched
+                        )
+                    if changed:
+                        logger.info(f"{index.__class__.__name__} 更新 {changed} 个文件")
+                    if changed or index._log_size:
+                        dirty.append(index)
+                except Exception as e:
+                    logger.error(f"刷新索引失败 {index.__class__.__name__}: {e}")
+            self._save(dirty)
+            self._touched = set()
+
+
+# 全局索引注册表
+graph_indexes = GraphIndexRegistry()
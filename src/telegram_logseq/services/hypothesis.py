@@ -1,16 +1,30 @@
-import requests
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from loguru import logger
 from datetime import datetime
 from pathlib import Path
+import aiohttp
+import asyncio
 import json
+import os
 
 from ..config.settings import settings
+from ..utils.locks import file_locks
+from ..utils.metrics import metrics
+from .graph_index import graph_indexes
 
 
 class HypothesisService:
     """Hypothesis 服务"""
 
+    # 每页标注数量（API 上限 200）
+    PAGE_SIZE = 200
+    # 同时请求的 URL 数量
+    MAX_CONCURRENCY = 4
+    # 请求超时（秒）
+    TIMEOUT = 30
+    # 增量同步状态文件
+    SYNC_FILE = "hypothesis_sync.json"
+
     def __init__(self):
         """初始化服务"""
         self.token = settings.HYPOTHESIS_TOKEN
@@ -19,6 +33,57 @@ class HypothesisService:
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json",
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._userid: Optional[str] = None
+        # 增量同步状态: 最后同步到的 updated 游标，已写入的标注 ID -> updated
+        self.cursor: Optional[str] = None
+        self.written: Dict[str, str] = {}
+        self._load_sync_state()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取复用连接池的 HTTP 会话"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.TIMEOUT),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """关闭 HTTP 会话"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def search(self, params: Dict[str, Any]) -> List[dict]:
+        """按 updated 升序，用 search_after 翻页获取全部结果
+
+        Args:
+            params: 搜索参数
+
+        Returns:
+            标注列表
+        """
+        session = self._get_session()
+        rows: List[dict] = []
+        params = {
+            **params,
+            "limit": self.PAGE_SIZE,
+            "sort": "updated",
+            "order": "asc",
+        }
+
+        while True:
+            async with metrics.track("hypothesis", "search"):
+                async with session.get(
+                    f"{self.api_url}/search", params=params
+                ) as response:
+                    response.raise_for_status()
+                    page = (await response.json())["rows"]
+
+            rows.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                return rows
+            params["search_after"] = page[-1]["updated"]
 
     async def get_annotations(self, url: str) -> list:
         """获取指定 URL 的标注
@@ -30,17 +95,35 @@ class HypothesisService:
             标注列表
         """
         try:
-            response = requests.get(
-                f"{self.api_url}/search",
-                headers=self.headers,
-                params={"uri": url, "limit": 200},
-            )
-            response.raise_for_status()
-            return response.json()["rows"]
+            return await self.search({"uri": url})
         except Exception as e:
             logger.error(f"获取标注失败: {e}")
             raise
 
+    async def get_annotations_many(self, urls: List[str]) -> Dict[str, list]:
+        """并发获取多个 URL 的标注
+
+        Args:
+            urls: 网页 URL 列表
+
+        Returns:
+            URL -> 标注列表，失败的 URL 不包含在结果中
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+
+        async def fetch(url: str) -> list:
+            async with semaphore:
+                return await self.get_annotations(url)
+
+        results = await asyncio.gather(
+            *(fetch(url) for url in urls), return_exceptions=True
+        )
+        return {
+            url: rows
+            for url, rows in zip(urls, results)
+            if not isinstance(rows, Exception)
+        }
+
     async def generate_markdown(self, annotations: list) -> str:
         """生成 Markdown 内容
 
@@ -79,10 +162,100 @@ class HypothesisService:
             # 保存到文件
             filename = f"hypothesis_{datetime.now().strftime('%Y%m%d')}.md"
             file_path = Path.cwd() / settings.GITHUB_REPO / "pages" / filename
+            file_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(file_path, "a", encoding="utf-8") as f:
-                f.write(content + "\n")
+            # 与其他写入方共用文件锁，追加和索引更新之间文件不会被改动
+            async with file_locks.path_lock(file_path):
+                with open(file_path, "a", encoding="utf-8") as f:
+                    f.write(content + "\n")
+                await graph_indexes.file_changed(file_path)
 
         except Exception as e:
             logger.error(f"保存标注失败: {e}")
             raise
+
+    def filter_new(self, annotations: list) -> list:
+        """过滤出尚未写入或写入后被编辑过的标注"""
+        return [
+            anno
+            for anno in annotations
+            if self.written.get(anno["id"]) != anno["updated"]
+        ]
+
+    async def save_new_annotations(self, annotations: list) -> int:
+        """按 URL 分组保存新增/编辑过的标注，并记录已写入的 ID
+
+        Args:
+            annotations: 标注列表
+
+        Returns:
+            实际写入的标注数量
+        """
+        new_annotations = self.filter_new(annotations)
+
+        grouped: Dict[str, list] = {}
+        for anno in new_annotations:
+            grouped.setdefault(anno["uri"], []).append(anno)
+        for rows in grouped.values():
+            await self.save_annotations(await self.generate_markdown(rows))
+
+        for anno in new_annotations:
+            self.written[anno["id"]] = anno["updated"]
+        if new_annotations:
+            self._save_sync_state()
+        return len(new_annotations)
+
+    async def get_userid(self) -> str:
+        """获取当前 Token 对应的用户 ID"""
+        if not self._userid:
+            session = self._get_session()
+            async with metrics.track("hypothesis", "profile"):
+                async with session.get(f"{self.api_url}/profile") as response:
+                    response.raise_for_status()
+                    self._userid = (await response.json())["userid"]
+        return self._userid
+
+    async def sync_annotations(self) -> int:
+        """增量同步当前用户的全部标注
+
+        只获取游标之后更新的标注，并跳过已经写入过的版本。
+
+        Returns:
+            同步的标注数量
+        """
+        params = {"user": await self.get_userid()}
+        if self.cursor:
+            params["search_after"] = self.cursor
+
+        annotations = await self.search(params)
+        count = await self.save_new_annotations(annotations)
+
+        if annotations:
+            self.cursor = annotations[-1]["updated"]
+            self._save_sync_state()
+
+        logger.info(f"Hypothesis 同步完成: {count} 条")
+        return count
+
+    def _load_sync_state(self) -> None:
+        """加载增量同步状态"""
+        sync_path = Path(self.SYNC_FILE)
+        if not sync_path.exists():
+            return
+        try:
+            with open(sync_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.cursor = data.get("cursor")
+            self.written = data.get("written", {})
+        except Exception as e:
+            logger.error(f"加载 Hypothesis 同步状态失败: {e}")
+
+    def _save_sync_state(self) -> None:
+        """保存增量同步状态"""
+        try:
+            tmp_path = Path(f"{self.SYNC_FILE}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"cursor": self.cursor, "written": self.written}, f)
+            os.replace(tmp_path, self.SYNC_FILE)
+        except Exception as e:
+            logger.error(f"保存 Hypothesis 同步状态失败: {e}")
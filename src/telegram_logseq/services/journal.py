@@ -4,6 +4,8 @@ from pathlib import Path
 from loguru import logger
 
 from ..config.settings import settings
+from .graph_index import graph_indexes
+from ..utils.metrics import metrics
 
 
 class JournalService:
@@ -38,6 +40,7 @@ class JournalService:
             return date.strftime("%H:%M")
         return date.strftime("%I:%M %p")
 
+    @metrics.timed("disk", "journal_append")
     async def add_entry(self, content: str) -> Path:
         """添加日志条目
 
@@ -67,6 +70,7 @@ class JournalService:
                 f.write(entry)
 
             logger.info(f"添加日志条目到 {path}")
+            await graph_indexes.file_changed(path)
             return path
 
         except Exception as e:
@@ -0,0 +1,178 @@
+from collections import deque
+from typing import Dict, List, Optional, Set
+
+from ..utils.text_utils import TextUtils
+from .graph_index import GraphIndex, graph_indexes
+
+
+class LinkIndexService(GraphIndex):
+    """页面链接索引
+
+    记录每个文件对应的页面名及其 [[链接]] / #标签，
+    用于生成命名空间和链接邻域思维导图，无需在请求时逐个打开文件。
+    """
+
+    NAME = "link_index"
+    VERSION = 2
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 持久化状态: 相对路径 -> {"page": 页面名, "links": [链接页面名]}
+        self.files: Dict[str, dict] = {}
+        # 派生状态（小写页面名为键）
+        self.names: Dict[str, str] = {}
+        # 页面名 -> 提到该名称（作为页面或链接）的文件，为空时名称被移除
+        self.owners: Dict[str, Set[str]] = {}
+        # 页面 -> 链接页面 -> 贡献这条边的文件
+        self.outgoing: Dict[str, Dict[str, Set[str]]] = {}
+        self.incoming: Dict[str, Dict[str, Set[str]]] = {}
+
+    def _parse_file(self, rel_path: str, content: str) -> Optional[dict]:
+        """解析单个文件"""
+        page = self.page_name_for(rel_path, content)
+        links = sorted(
+            {
+                token.value.strip()
+                for token in TextUtils.tokenize(content)
+                if token.kind in ("ref", "tag")
+            }
+            - {""}
+        )
+        return {"page": page, "links": links}
+
+    def _add_file(self, rel_path: str, entry: dict) -> None:
+        """登记单个文件"""
+        self.files[rel_path] = entry
+        self._add_edges(rel_path, entry["page"], entry["links"])
+
+    def _remove_file(self, rel_path: str) -> None:
+        """从索引中移除文件（只撤销该文件贡献的边和名称）"""
+        entry = self.files.pop(rel_path, None)
+        if not entry:
+            return
+        key = entry["page"].lower()
+        for link_key in {link.lower() for link in entry["links"]} - {key}:
+            self._discard_edge(self.outgoing, key, link_key, rel_path)
+            self._discard_edge(self.incoming, link_key, key, rel_path)
+            self._release_name(link_key, rel_path)
+        self._release_name(key, rel_path)
+
+    def _dump_state(self) -> dict:
+        return {"files": self.files}
+
+    def _load_state(self, state: dict) -> None:
+        self.files = state.get("files", {})
+        self.names, self.owners, self.outgoing, self.incoming = {}, {}, {}, {}
+        for rel_path, entry in self.files.items():
+            self._add_edges(rel_path, entry["page"], entry["links"])
+
+    def _add_edges(self, rel_path: str, page: str, links: List[str]) -> None:
+        """添加文件贡献的页面到链接的边"""
+        key = page.lower()
+        self.names[key] = page
+        self.owners.setdefault(key, set()).add(rel_path)
+        for link in links:
+            link_key = link.lower()
+            if link_key == key:
+                continue
+            self.names.setdefault(link_key, link)
+            self.owners.setdefault(link_key, set()).add(rel_path)
+            self.outgoing.setdefault(key, {}).setdefault(link_key, set()).add(rel_path)
+            self.incoming.setdefault(link_key, {}).setdefault(key, set()).add(rel_path)
+
+    @staticmethod
+    def _discard_edge(
+        edges: Dict[str, Dict[str, Set[str]]], key: str, other: str, rel_path: str
+    ) -> None:
+        """撤销文件对一条边的贡献，没有文件再贡献时删除该边"""
+        targets = edges.get(key)
+        if targets is None or other not in targets:
+            return
+        targets[other].discard(rel_path)
+        if not targets[other]:
+            del targets[other]
+            if not targets:
+                del edges[key]
+
+    def _release_name(self, key: str, rel_path: str) -> None:
+        """撤销文件对名称的引用，没有文件再提到时移除该名称"""
+        owners = self.owners.get(key)
+        if owners is None:
+            return
+        owners.discard(rel_path)
+        if not owners:
+            del self.owners[key]
+            self.names.pop(key, None)
+
+    def has_page(self, page: str) -> bool:
+        """页面是否存在于索引中"""
+        self.ensure_loaded()
+        return page.lower() in self.names
+
+    def namespace_tree(self, namespace: str) -> Optional[dict]:
+        """构建命名空间树
+
+        Args:
+            namespace: 命名空间，如 a/b
+
+        Returns:
+            思维导图树形结构，命名空间下没有页面时返回 None
+        """
+        self.ensure_loaded()
+        prefix = namespace.strip("/").lower()
+        root = {"name": namespace.strip("/"), "children": []}
+        nodes = {prefix: root}
+
+        members = sorted(
+            name for key, name in self.names.items() if key.startswith(prefix + "/")
+        )
+        if not members:
+            return None
+
+        for name in members:
+            parts = name.split("/")
+            depth = len(prefix.split("/"))
+            for i in range(depth + 1, len(parts) + 1):
+                key = "/".join(parts[:i]).lower()
+                if key not in nodes:
+                    node = {"name": parts[i - 1], "children": []}
+                    nodes["/".join(parts[: i - 1]).lower()]["children"].append(node)
+                    nodes[key] = node
+        return root
+
+    def neighbourhood_tree(self, page: str, hops: int = 2) -> Optional[dict]:
+        """构建页面链接邻域树（广度优先，正反向链接都计入）
+
+        Args:
+            page: 页面名
+            hops: 最大跳数
+
+        Returns:
+            思维导图树形结构，页面不存在时返回 None
+        """
+        self.ensure_loaded()
+        start = page.lower()
+        if start not in self.names:
+            return None
+
+        root = {"name": self.names[start], "children": []}
+        visited = {start}
+        queue = deque([(start, root, 0)])
+
+        while queue:
+            key, node, depth = queue.popleft()
+            if depth >= hops:
+                continue
+            neighbours = (
+                self.outgoing.get(key, {}).keys() | self.incoming.get(key, {}).keys()
+            )
+            for neighbour in sorted(neighbours - visited):
+                visited.add(neighbour)
+                child = {"name": self.names.get(neighbour, neighbour), "children": []}
+                node["children"].append(child)
+                queue.append((neighbour, child, depth + 1))
+        return root
+
+
+# 全局链接索引
+link_index = graph_indexes.register(LinkIndexService())
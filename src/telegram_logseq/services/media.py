@@ -1,92 +1,238 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Set
 from telegram import Message
 from loguru import logger
+import asyncio
+import hashlib
+import json
+import os
 
 from ..config.settings import settings
-from ..utils.text_utils import TextUtils
+from ..utils import image_utils
+from ..utils.metrics import metrics
 
 
-class MediaService:
-    """媒体服务类"""
-
-    def __init__(self):
-        """初始化服务"""
-        self.assets_dir = Path("assets")
-        self.assets_dir.mkdir(exist_ok=True)
+@dataclass
+class StoredMedia:
+    """已保存的媒体资源"""
 
-    async def handle_media(self, message: Message) -> Optional[str]:
-        """处理媒体消息
-
-        Args:
-            message: Telegram 消息对象
+    filename: str
+    is_new: bool
+    thumbnail: Optional[str] = None
+    # 新文件的内容，直接交给提交层，无需再从磁盘读取
+    content: Optional[bytes] = None
+    thumbnail_content: Optional[bytes] = None
+    # 新文件的索引键，提交成功后由 confirm 记录
+    digest: Optional[str] = None
+    unique_id: Optional[str] = None
 
-        Returns:
-            媒体文件路径或 None
-        """
-        try:
-            # 获取文件
-            if message.photo:
-                file = message.photo[-1]  # 获取最大尺寸的图片
-                extension = ".jpg"
-            elif message.document:
-                file = message.document
-                extension = Path(file.file_name).suffix if file.file_name else ".file"
-            else:
-                return None
-
-            # 下载文件
-            file_obj = await file.get_file()
 
-            # 生成文件名
-            filename = TextUtils.clean_title(message.caption or "media")
-            if not filename:
-                filename = file.file_unique_id
+class MediaService:
+    """媒体服务类
 
-            # 确保文件名唯一
-            filepath = self._get_unique_filepath(filename, extension)
+    资源文件按内容哈希命名，并维护持久化的 哈希/file_unique_id -> 资源 索引，
+    重复的媒体会直接复用已有资源，跳过下载和上传。
+    """
 
-            # 保存文件
-            await file_obj.download_to_drive(filepath)
+    DB_FILE = "media_index.json"
 
-            logger.info(f"保存媒体文件: {filepath}")
-            return str(filepath)
+    # 图片转码进程池（首次使用时创建，所有实例共享）
+    _pool: Optional[ProcessPoolExecutor] = None
 
-        except Exception as e:
-            logger.error(f"处理媒体文件失败: {e}")
-            return None
+    # 后台写入本地副本的任务（保留引用，避免被垃圾回收）
+    _write_tasks: Set[asyncio.Task] = set()
 
-    def _get_unique_filepath(self, filename: str, extension: str) -> Path:
-        """获取唯一的文件路径
+    def __init__(self):
+        """初始化服务"""
+        self.assets_dir = Path.cwd() / settings.GITHUB_REPO / "assets"
+        self.assets_dir.mkdir(parents=True, exist_ok=True)
+        # 内容哈希 -> 资源文件名
+        self.hashes: Dict[str, str] = {}
+        # Telegram file_unique_id -> 资源文件名
+        self.unique_ids: Dict[str, str] = {}
+        # 资源文件名 -> 缩略图文件名
+        self.thumbnails: Dict[str, str] = {}
+        self._load_index()
+
+        if settings.MEDIA_TRANSCODE and not image_utils.is_available():
+            logger.warning("未安装 Pillow，图片压缩功能不可用")
+
+    async def store(self, message: Message) -> Optional[StoredMedia]:
+        """保存消息中的媒体文件
 
         Args:
-            filename: 文件名
-            extension: 扩展名
+            message: Telegram 消息对象
 
         Returns:
-            唯一的文件路径
+            已保存的媒体资源，不是媒体消息时返回 None
         """
-        base_path = self.assets_dir / f"{filename}{extension}"
-        if not base_path.exists():
-            return base_path
+        # 获取文件
+        if message.photo:
+            file = message.photo[-1]  # 获取最大尺寸的图片
+            extension = ".jpg"
+            max_size = settings.MEDIA_PHOTO_MAX_SIZE
+        elif message.document:
+            file = message.document
+            extension = Path(file.file_name).suffix if file.file_name else ".file"
+            max_size = settings.MEDIA_DOCUMENT_MAX_SIZE
+        else:
+            return None
 
-        # 如果文件已存在，添加数字后缀
-        counter = 1
-        while True:
-            new_path = self.assets_dir / f"{filename}_{counter}{extension}"
-            if not new_path.exists():
-                return new_path
-            counter += 1
+        # 同一个 Telegram 文件无需重复下载
+        filename = self.unique_ids.get(file.file_unique_id)
+        if filename:
+            logger.info(f"复用媒体文件: {filename}")
+            return StoredMedia(filename, False, self.thumbnails.get(filename))
 
-    def get_media_url(self, filepath: str) -> str:
-        """获取媒体文件的 URL
+        # 下载文件
+        async with metrics.track("telegram", "get_file"):
+            file_obj = await file.get_file()
+        async with metrics.track("telegram", "download"):
+            content = bytes(await file_obj.download_as_bytearray())
+
+        # 内容相同的文件复用已有资源（按原始内容计算哈希）
+        digest = hashlib.sha256(content).hexdigest()
+        filename = self.hashes.get(digest)
+        if filename:
+            logger.info(f"复用媒体文件: {filename}")
+            self.unique_ids[file.file_unique_id] = filename
+            self._save_index()
+            return StoredMedia(filename, False, self.thumbnails.get(filename))
+
+        # 可选：在进程池中压缩图片
+        thumbnail_content = None
+        extension = extension.lower()
+        if self._should_transcode(extension, max_size):
+            try:
+                content, extension, thumbnail_content = await self._transcode(
+                    content, max_size
+                )
+            except Exception as e:
+                logger.error(f"压缩图片失败，保留原图: {e}")
+
+        filename = f"{digest[:16]}{extension}"
+        thumbnail = f"{digest[:16]}_thumb{extension}" if thumbnail_content else None
+
+        # 本地副本在后台线程写入（或按配置跳过），不阻塞提交
+        if settings.MEDIA_KEEP_LOCAL_COPY:
+            self._write_in_background(filename, content)
+            if thumbnail:
+                self._write_in_background(thumbnail, thumbnail_content)
+
+        # 索引在提交成功后才记录（见 confirm），上传失败时下次仍会重新上传
+        logger.info(f"保存媒体文件: {filename}")
+        return StoredMedia(
+            filename,
+            True,
+            thumbnail,
+            content,
+            thumbnail_content,
+            digest,
+            file.file_unique_id,
+        )
+
+    def confirm(self, media: StoredMedia) -> None:
+        """新媒体提交成功后记录到索引，之后的重复媒体直接复用
 
         Args:
-            filepath: 文件路径
+            media: store 返回的新媒体资源
+        """
+        if not media.is_new:
+            return
+        self.hashes[media.digest] = media.filename
+        self.unique_ids[media.unique_id] = media.filename
+        if media.thumbnail:
+            self.thumbnails[media.filename] = media.thumbnail
+        self._save_index()
+
+    def _write_in_background(self, filename: str, content: bytes) -> None:
+        """在后台线程中写入本地资源文件"""
+        task = asyncio.create_task(
+            asyncio.to_thread(self.get_asset_path(filename).write_bytes, content)
+        )
+        self._write_tasks.add(task)
+        task.add_done_callback(self._on_write_done)
+
+    @classmethod
+    def _on_write_done(cls, task: asyncio.Task) -> None:
+        """后台写入完成回调"""
+        cls._write_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"写入本地媒体文件失败: {task.exception()}")
+
+    def _should_transcode(self, extension: str, max_size: int) -> bool:
+        """是否需要压缩该文件"""
+        if not settings.MEDIA_TRANSCODE or not image_utils.is_available():
+            return False
+        if extension not in image_utils.TRANSCODABLE_EXTENSIONS:
+            return False
+        # 未设置尺寸上限且不生成缩略图时保留原图
+        return max_size > 0 or settings.MEDIA_THUMBNAIL_SIZE > 0
+
+    async def _transcode(self, content: bytes, max_size: int):
+        """在进程池中压缩图片，不阻塞事件循环"""
+        if MediaService._pool is None:
+            MediaService._pool = ProcessPoolExecutor(max_workers=settings.MEDIA_WORKERS)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            MediaService._pool,
+            image_utils.transcode_image,
+            content,
+            max_size,
+            settings.MEDIA_FORMAT,
+            settings.MEDIA_QUALITY,
+            settings.MEDIA_THUMBNAIL_SIZE,
+        )
+
+    def get_asset_path(self, filename: str) -> Path:
+        """获取资源文件的本地路径"""
+        return self.assets_dir / filename
+
+    def get_media_url(self, media: StoredMedia) -> str:
+        """获取媒体文件的 Logseq 引用
+
+        Args:
+            media: 已保存的媒体资源
 
         Returns:
-            媒体文件 URL
+            Markdown 图片引用，有缩略图时显示缩略图并链接到原图
         """
-        # 将本地路径转换为相对路径
-        relative_path = Path(filepath).relative_to(self.assets_dir)
-        return f"![{relative_path}](../assets/{relative_path})"
+        if media.thumbnail:
+            return (
+                f"[![{media.filename}](../assets/{media.thumbnail})]"
+                f"(../assets/{media.filename})"
+            )
+        return f"![{media.filename}](../assets/{media.filename})"
+
+    def _load_index(self) -> None:
+        """加载媒体索引"""
+        db_path = Path(self.DB_FILE)
+        if not db_path.exists():
+            return
+        try:
+            with open(db_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.hashes = data.get("hashes", {})
+            self.unique_ids = data.get("unique_ids", {})
+            self.thumbnails = data.get("thumbnails", {})
+        except Exception as e:
+            logger.error(f"加载媒体索引失败: {e}")
+
+    def _save_index(self) -> None:
+        """保存媒体索引"""
+        try:
+            tmp_path = Path(f"{self.DB_FILE}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "hashes": self.hashes,
+                        "unique_ids": self.unique_ids,
+                        "thumbnails": self.thumbnails,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, self.DB_FILE)
+        except Exception as e:
+            logger.error(f"保存媒体索引失败: {e}")
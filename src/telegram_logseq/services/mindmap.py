@@ -1,14 +1,21 @@
 from pathlib import Path
 from loguru import logger
 import re
+import json
 from bs4 import BeautifulSoup
 
 from ..config.settings import settings
+from .graph_index import graph_indexes
+from .link_index import link_index
+from .page_index import page_index
 
 
 class MindmapService:
     """思维导图服务"""
 
+    # 链接邻域最大跳数
+    MAX_HOPS = 5
+
     def __init__(self):
         """初始化服务"""
         self.repo_path = Path.cwd() / settings.GITHUB_REPO
@@ -75,7 +82,7 @@ class MindmapService:
         </html>
         """
 
-        return html_template % str(data).replace("'", '"')
+        return html_template % json.dumps(data, ensure_ascii=False)
 
     async def generate_mindmap(self, page_name: str) -> str:
         """生成思维导图
@@ -87,14 +94,12 @@ class MindmapService:
             HTML 内容路径
         """
         try:
-            # 构建文件路径
-            if not page_name.endswith(".md"):
-                page_name += ".md"
-            page_path = self.repo_path / "pages" / page_name
-
-            # 读取文件内容
-            if not page_path.exists():
+            # 通过页面名索引解析文件路径（大小写、别名、命名空间编码）
+            await graph_indexes.ready()
+            rel_path = page_index.resolve(page_name)
+            if not rel_path:
                 raise FileNotFoundError(f"页面不存在: {page_name}")
+            page_path = self.repo_path / rel_path
 
             with open(page_path, "r", encoding="utf-8") as f:
                 content = f.read()
@@ -102,20 +107,60 @@ class MindmapService:
             # 解析 Markdown 内容为树形结构
             data = self.parse_markdown(content)
 
-            # 生成 HTML 格式的思维导图
-            html = self.generate_html(data)
-
-            # 保存 HTML 文件
-            output_path = (
-                self.repo_path / "mindmaps" / f"{page_name.replace('.md', '.html')}"
-            )
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(html)
-
-            return str(output_path)
+            return self._save_html(page_name.removesuffix(".md"), data)
 
         except Exception as e:
             logger.error(f"生成思维导图失败: {e}")
             raise
+
+    async def generate_namespace_mindmap(self, namespace: str) -> str:
+        """生成命名空间思维导图
+
+        Args:
+            namespace: 命名空间，如 a/b
+
+        Returns:
+            HTML 内容路径
+        """
+        await graph_indexes.ready()
+        data = link_index.namespace_tree(namespace)
+        if not data:
+            raise FileNotFoundError(f"命名空间不存在: {namespace}")
+        return self._save_html(f"ns_{namespace}", data)
+
+    async def generate_graph_mindmap(self, page_name: str, hops: int = 2) -> str:
+        """生成页面链接邻域思维导图
+
+        Args:
+            page_name: 页面名称
+            hops: 沿链接展开的最大跳数
+
+        Returns:
+            HTML 内容路径
+        """
+        hops = max(1, min(hops, self.MAX_HOPS))
+        await graph_indexes.ready()
+        data = link_index.neighbourhood_tree(page_name, hops)
+        if not data:
+            raise FileNotFoundError(f"页面不存在: {page_name}")
+        return self._save_html(f"graph_{page_name}_{hops}", data)
+
+    def _save_html(self, name: str, data: dict) -> str:
+        """生成并保存思维导图 HTML
+
+        Args:
+            name: 输出文件名（不含扩展名）
+            data: 树形结构数据
+
+        Returns:
+            HTML 文件路径
+        """
+        html = self.generate_html(data)
+
+        output_path = self.repo_path / "mindmaps" / f"{name.replace('/', '___')}.html"
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(html)
+
+        return str(output_path)
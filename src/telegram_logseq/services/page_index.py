@@ -0,0 +1,171 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..utils.text_utils import TextUtils
+from .graph_index import GraphIndex, graph_indexes
+
+
+class PageIndexService(GraphIndex):
+    """页面名解析索引
+
+    支持大小写折叠的标题、alias:: 别名、Logseq 命名空间文件名编码
+    (%2F / ___) 以及基于三元组的模糊匹配，解析无需探测文件系统。
+    """
+
+    NAME = "page_index"
+
+    # 模糊匹配的最低相似度（Jaccard）
+    FUZZY_THRESHOLD = 0.4
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 持久化状态: 相对路径 -> {"page": 页面名, "aliases": [别名]}
+        self.files: Dict[str, dict] = {}
+        # 派生状态: 规范化名称 -> 相对路径
+        self.keys: Dict[str, str] = {}
+        # 规范化名称 -> 使用该名称的所有相对路径（被遮蔽的同名文件也在其中）
+        self.owners: Dict[str, Set[str]] = {}
+        # 三元组 -> 规范化名称
+        self.trigrams: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def normalize(name: str) -> str:
+        """规范化页面名：解码文件名编码、折叠大小写和空白
+
+        结果带缓存：反向链接索引在事件循环中应用更新时对每个引用调用它
+        """
+        name = TextUtils.page_name_from_filename(name.strip())
+        return " ".join(name.split()).strip("/").casefold()
+
+    @staticmethod
+    def _trigrams(key: str) -> Set[str]:
+        """生成三元组"""
+        padded = f"  {key} "
+        return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def _parse_aliases(content: str) -> List[str]:
+        """解析页面首部的 alias:: 属性"""
+        aliases = []
+        for line in content.split("\n", 10)[:10]:
+            line = line.strip().lstrip("- ")
+            if line.lower().startswith("alias::"):
+                value = line.split("::", 1)[1]
+                for alias in value.split(","):
+                    alias = alias.strip().strip("[]").strip()
+                    if alias:
+                        aliases.append(alias)
+        return aliases
+
+    def _parse_file(self, rel_path: str, content: str) -> Optional[dict]:
+        """解析单个文件"""
+        page = self.page_name_for(rel_path, content)
+        return {"page": page, "aliases": self._parse_aliases(content)}
+
+    def _add_file(self, rel_path: str, entry: dict) -> None:
+        """登记单个文件"""
+        self.files[rel_path] = entry
+        self._add_keys(rel_path, entry["page"], entry["aliases"])
+
+    def _remove_file(self, rel_path: str) -> None:
+        """从索引中移除文件"""
+        entry = self.files.pop(rel_path, None)
+        if not entry:
+            return
+        for name in [entry["page"], *entry["aliases"], rel_path.rsplit("/", 1)[-1]]:
+            key = self.normalize(name)
+            owners = self.owners.get(key)
+            if not owners or rel_path not in owners:
+                continue
+            owners.discard(rel_path)
+            if owners:
+                # 同名的其他文件重新接管该名称
+                self.keys[key] = self._preferred(owners)
+                continue
+            del self.owners[key]
+            del self.keys[key]
+            for trigram in self._trigrams(key):
+                keys = self.trigrams.get(trigram)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self.trigrams[trigram]
+
+    def _dump_state(self) -> dict:
+        return {"files": self.files}
+
+    def _load_state(self, state: dict) -> None:
+        self.files = state.get("files", {})
+        self.keys, self.owners, self.trigrams = {}, {}, {}
+        for rel_path, entry in self.files.items():
+            self._add_keys(rel_path, entry["page"], entry["aliases"])
+
+    def _add_keys(self, rel_path: str, page: str, aliases: List[str]) -> None:
+        """登记页面名、别名和文件名"""
+        for name in [page, *aliases, rel_path.rsplit("/", 1)[-1]]:
+            key = self.normalize(name)
+            if not key:
+                continue
+            owners = self.owners.setdefault(key, set())
+            owners.add(rel_path)
+            self.keys[key] = self._preferred(owners)
+            for trigram in self._trigrams(key):
+                self.trigrams.setdefault(trigram, set()).add(key)
+
+    @staticmethod
+    def _preferred(owners: Set[str]) -> str:
+        """同名文件中选出名称的归属：pages 目录中的页面优先于同名日志"""
+        return min(owners, key=lambda path: (not path.startswith("pages/"), path))
+
+    def resolve(self, name: str) -> Optional[str]:
+        """精确解析页面名（含别名与文件名编码）
+
+        Args:
+            name: 页面名、别名或相对路径
+
+        Returns:
+            相对仓库根目录的文件路径，找不到时返回 None
+        """
+        self.ensure_loaded()
+        return self.keys.get(self.normalize(name.removeprefix("pages/")))
+
+    def suggest(self, name: str, limit: int = 3) -> List[Tuple[str, str]]:
+        """模糊匹配相似页面
+
+        Args:
+            name: 页面名
+            limit: 最大返回数量
+
+        Returns:
+            [(页面名, 相对路径), ...]，按相似度降序
+        """
+        self.ensure_loaded()
+        key = self.normalize(name.removeprefix("pages/"))
+        grams = self._trigrams(key)
+        counts: Dict[str, int] = {}
+        for trigram in grams:
+            for candidate in self.trigrams.get(trigram, ()):
+                counts[candidate] = counts.get(candidate, 0) + 1
+
+        scored = []
+        for candidate, shared in counts.items():
+            score = shared / (len(grams) + len(candidate) + 1 - shared)
+            if score >= self.FUZZY_THRESHOLD:
+                scored.append((score, candidate))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+
+        results, seen = [], set()
+        for _, candidate in scored:
+            rel_path = self.keys[candidate]
+            if rel_path in seen:
+                continue
+            seen.add(rel_path)
+            results.append((self.files[rel_path]["page"], rel_path))
+            if len(results) >= limit:
+                break
+        return results
+
+
+# 全局页面名索引
+page_index = graph_indexes.register(PageIndexService())
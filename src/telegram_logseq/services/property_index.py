@@ -0,0 +1,198 @@
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, List, Optional, Set, Tuple
+import re
+
+from ..utils.text_utils import TextUtils
+from .graph_index import GraphIndex, graph_indexes
+
+# 块的开始行（属性归属于它之前最近的块；之前没有块则为页面属性）
+_BLOCK_START_RE = re.compile(r"^[ \t]*- ")
+# 查询条件: key:: value（value 可为空，表示只要求存在该属性）
+_CONDITION_RE = re.compile(r"([^:\s]+)::[ \t]*(.*?)(?=\s+[^:\s]+::|\s*$)", re.S)
+
+# 页面属性使用的块行号
+PAGE_BLOCK = -1
+
+
+class PropertyIndexService(GraphIndex):
+    """属性索引
+
+    以 key:: value 为键记录页面属性和块属性，
+    多条件查询直接对倒排表求交集，无需重新读取文件。
+    """
+
+    NAME = "property_index"
+    VERSION = 2
+
+    # 索引中保存的块文本最大长度
+    MAX_BLOCK_LENGTH = 200
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 持久化状态: 相对路径 -> {"page": 页面名, "blocks": [[行号, 块文本, 属性]]}
+        # 属性: [[属性名, 属性值], ...]，页面属性的行号为 PAGE_BLOCK
+        self.files: Dict[str, dict] = {}
+        # 派生状态: 属性名 -> 属性值 -> {相对路径: [块序号]}
+        self.postings: Dict[str, Dict[str, Dict[str, List[int]]]] = {}
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """规范化属性名/属性值，用于匹配"""
+        return text.strip().casefold()
+
+    @staticmethod
+    def split_values(value: str) -> List[str]:
+        """拆分属性值：整体值以及逗号分隔的各项（去掉 [[ ]] 和 #）"""
+        values = [value]
+        for part in value.split(","):
+            part = part.strip()
+            if part.startswith("[[") and part.endswith("]]"):
+                part = part[2:-2]
+            part = part.lstrip("#").strip()
+            if part and part not in values:
+                values.append(part)
+        return values
+
+    @classmethod
+    def _parse_blocks(cls, content: str) -> List[list]:
+        """解析带属性的页面和块"""
+        lines = content.split("\n")
+        offsets = [0, *accumulate(len(line) + 1 for line in lines)]
+        block_starts = [
+            i for i, line in enumerate(lines) if _BLOCK_START_RE.match(line)
+        ]
+
+        blocks: Dict[int, list] = {}
+        for token in TextUtils.tokenize(content):
+            if token.kind != "property":
+                continue
+            key = token.key
+
+            line_no = bisect_right(offsets, token.start) - 1
+            owner = bisect_right(block_starts, line_no) - 1
+            block_line = block_starts[owner] if owner >= 0 else PAGE_BLOCK
+            if block_line not in blocks:
+                text = "" if block_line == PAGE_BLOCK else lines[block_line].strip()
+                if text.startswith("- "):
+                    text = text[2:]
+                blocks[block_line] = [block_line, text[: cls.MAX_BLOCK_LENGTH], []]
+            blocks[block_line][2].append([key, token.value])
+
+        return [blocks[line_no] for line_no in sorted(blocks)]
+
+    def _parse_file(self, rel_path: str, content: str) -> Optional[dict]:
+        """解析单个文件，没有属性时返回 None"""
+        blocks = self._parse_blocks(content)
+        if not blocks:
+            return None
+        return {"page": self.page_name_for(rel_path, content), "blocks": blocks}
+
+    def _add_file(self, rel_path: str, entry: dict) -> None:
+        """登记单个文件"""
+        self.files[rel_path] = entry
+        self._add_postings(rel_path, entry["blocks"])
+
+    def _remove_file(self, rel_path: str) -> None:
+        """从索引中移除文件"""
+        entry = self.files.pop(rel_path, None)
+        if not entry:
+            return
+        for _, _, properties in entry["blocks"]:
+            for key, value in properties:
+                key = self.normalize(key)
+                values = self.postings.get(key)
+                if values is None:
+                    continue
+                for part in self.split_values(value):
+                    part = self.normalize(part)
+                    sources = values.get(part)
+                    if sources is None:
+                        continue
+                    sources.pop(rel_path, None)
+                    if not sources:
+                        del values[part]
+                if not values:
+                    del self.postings[key]
+
+    def _dump_state(self) -> dict:
+        return {"files": self.files}
+
+    def _load_state(self, state: dict) -> None:
+        self.files = state.get("files", {})
+        self.postings = {}
+        for rel_path, entry in self.files.items():
+            self._add_postings(rel_path, entry["blocks"])
+
+    def _add_postings(self, rel_path: str, blocks: List[list]) -> None:
+        """登记属性到块的倒排项"""
+        for i, (_, _, properties) in enumerate(blocks):
+            for key, value in properties:
+                values = self.postings.setdefault(self.normalize(key), {})
+                for part in self.split_values(value):
+                    indexes = values.setdefault(self.normalize(part), {})
+                    indexes = indexes.setdefault(rel_path, [])
+                    if not indexes or indexes[-1] != i:
+                        indexes.append(i)
+
+    @staticmethod
+    def parse_query(query: str) -> List[Tuple[str, str]]:
+        """解析查询条件，如 "type:: book status:: reading"
+
+        Returns:
+            [(属性名, 属性值), ...]，属性值为空表示只要求存在该属性
+        """
+        return [(key, value.strip()) for key, value in _CONDITION_RE.findall(query)]
+
+    def _matches(self, key: str, value: str) -> Set[Tuple[str, int]]:
+        """单个条件命中的 (相对路径, 块序号)"""
+        values = self.postings.get(self.normalize(key), {})
+        if value:
+            candidates = [values.get(self.normalize(value), {})]
+        else:
+            candidates = list(values.values())
+        return {
+            (rel_path, i)
+            for sources in candidates
+            for rel_path, indexes in sources.items()
+            for i in indexes
+        }
+
+    def query(
+        self, conditions: List[Tuple[str, str]]
+    ) -> List[Tuple[str, Optional[str]]]:
+        """查询同时满足所有条件的页面和块
+
+        Args:
+            conditions: [(属性名, 属性值), ...]
+
+        Returns:
+            [(页面名, 块文本), ...]，页面属性命中时块文本为 None；
+            按页面名和行号排序
+        """
+        self.ensure_loaded()
+        if not conditions:
+            return []
+
+        # 从最短的倒排表开始求交集
+        matches = sorted(
+            (self._matches(key, value) for key, value in conditions), key=len
+        )
+        hits = matches[0]
+        for other in matches[1:]:
+            if not hits:
+                break
+            hits &= other
+
+        results = []
+        for rel_path, i in sorted(
+            hits, key=lambda hit: (self.files[hit[0]]["page"].casefold(), hit[1])
+        ):
+            entry = self.files[rel_path]
+            line_no, text, _ = entry["blocks"][i]
+            results.append((entry["page"], None if line_no == PAGE_BLOCK else text))
+        return results
+
+
+# 全局属性索引
+property_index = graph_indexes.register(PropertyIndexService())
@@ -3,7 +3,7 @@ from telegram.ext import Application
 from loguru import logger
 
 from ..config.settings import settings
-from .github import GitHubService
+from .container import services
 from .age import AgeService
 
 
@@ -35,7 +35,7 @@ class SchedulerService:
                 await AgeService.generate_key_file()
 
             # 同步Git仓库
-            github_service = GitHubService()
+            github_service = services.github
             await github_service.sync_to_json()
 
             # 更新日历文件
@@ -0,0 +1,258 @@
+from datetime import date, datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+import hashlib
+import re
+
+from ..config.settings import settings
+from .graph_index import GraphIndex, graph_indexes
+
+# 任务标记
+OPEN_MARKERS = ("NOW", "DOING", "TODO", "LATER", "WAITING")
+CLOSED_MARKERS = ("DONE", "CANCELED", "CANCELLED")
+
+# 任务块：允许行首的缩进、列表符号/日志标题和时间戳，如 "## 10:30 - LATER 买牛奶"
+_MARKERS = "|".join(OPEN_MARKERS + CLOSED_MARKERS)
+_TASK_RE = re.compile(
+    r"^(?P<prefix>[ \t]*(?:[-*#]+[ \t]+)*"
+    r"(?:\d{1,2}:\d{2}(?:[ \t]?[AP]M)?[ \t]+)?(?:-[ \t]+)?)"
+    rf"(?P<marker>{_MARKERS})\b[ \t]*(?P<text>.*)$"
+)
+_PLANNING_RE = re.compile(r"\b(SCHEDULED|DEADLINE):\s*<(\d{4}-\d{2}-\d{2})[^>]*>?")
+# 新块的开始（planning 信息只在任务块的后续行中查找）
+_BLOCK_START_RE = re.compile(r"^[ \t]*(?:[-*]|#+)[ \t]")
+
+
+class Task(NamedTuple):
+    """任务块"""
+
+    id: str
+    rel_path: str
+    page: str
+    line_no: int
+    marker: str
+    text: str
+    date: Optional[str]
+    scheduled: Optional[str]
+    deadline: Optional[str]
+
+    @property
+    def due(self) -> Optional[str]:
+        """排序用的日期：截止 > 计划 > 所在日志日期"""
+        return self.deadline or self.scheduled or self.date
+
+
+class TaskIndexService(GraphIndex):
+    """任务索引
+
+    按标记、页面、日期和 SCHEDULED/DEADLINE 记录任务块，
+    列出任务和标记完成时无需扫描图谱。
+    """
+
+    NAME = "task_index"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 持久化状态: 相对路径 -> {"page", "date", "tasks": [任务行]}
+        # 任务行: [行号, 标记, 文本, 计划日期, 截止日期]
+        self.files: Dict[str, dict] = {}
+        # 派生状态: 标记 -> 含该标记任务的文件；任务 ID -> (相对路径, 行号)
+        self.by_marker: Dict[str, Set[str]] = {}
+        self.ids: Dict[str, Tuple[str, int]] = {}
+
+    @staticmethod
+    def task_id(rel_path: str, line_no: int, text: str) -> str:
+        """任务 ID（足够短，可放进回调数据）
+
+        包含任务文本，行号移动后旧按钮不会指向同一行上的其他任务。
+        """
+        key = f"{rel_path}:{line_no}:{text}"
+        return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+    def journal_date(self, rel_path: str) -> Optional[str]:
+        """日志文件对应的日期"""
+        folder, _, filename = rel_path.rpartition("/")
+        if folder != settings.JOURNALS_FOLDER:
+            return None
+        stem = filename.removesuffix(settings.JOURNALS_FILES_EXTENSION)
+        if settings.JOURNALS_PREFIX != "none":
+            stem = stem.removeprefix(settings.JOURNALS_PREFIX)
+        try:
+            parsed = datetime.strptime(stem, settings.JOURNALS_FILES_FORMAT)
+        except ValueError:
+            return None
+        return parsed.strftime("%Y-%m-%d")
+
+    @staticmethod
+    def _parse_tasks(content: str) -> List[list]:
+        """解析任务块"""
+        lines = content.split("\n")
+        tasks = []
+        for line_no, line in enumerate(lines):
+            match = _TASK_RE.match(line)
+            if not match:
+                continue
+
+            planning = dict(_PLANNING_RE.findall(line))
+            for next_line in lines[line_no + 1 : line_no + 4]:
+                if _BLOCK_START_RE.match(next_line):
+                    break
+                planning.update(_PLANNING_RE.findall(next_line))
+
+            text = _PLANNING_RE.sub("", match.group("text")).strip()
+            tasks.append(
+                [
+                    line_no,
+                    match.group("marker"),
+                    text,
+                    planning.get("SCHEDULED"),
+                    planning.get("DEADLINE"),
+                ]
+            )
+        return tasks
+
+    def _parse_file(self, rel_path: str, content: str) -> Optional[dict]:
+        """解析单个文件，没有任务时返回 None"""
+        tasks = self._parse_tasks(content)
+        if not tasks:
+            return None
+        return {
+            "page": self.page_name_for(rel_path, content),
+            "date": self.journal_date(rel_path),
+            "tasks": tasks,
+        }
+
+    def _add_file(self, rel_path: str, entry: dict) -> None:
+        """登记单个文件"""
+        self.files[rel_path] = entry
+        self._add_tasks(rel_path, entry["tasks"])
+
+    def _remove_file(self, rel_path: str) -> None:
+        """从索引中移除文件"""
+        entry = self.files.pop(rel_path, None)
+        if not entry:
+            return
+        for line_no, marker, text, *_ in entry["tasks"]:
+            self.ids.pop(self.task_id(rel_path, line_no, text), None)
+            paths = self.by_marker.get(marker)
+            if paths is not None:
+                paths.discard(rel_path)
+
+    def _dump_state(self) -> dict:
+        return {"files": self.files}
+
+    def _load_state(self, state: dict) -> None:
+        self.files = state.get("files", {})
+        self.by_marker, self.ids = {}, {}
+        for rel_path, entry in self.files.items():
+            self._add_tasks(rel_path, entry["tasks"])
+
+    def _add_tasks(self, rel_path: str, tasks: List[list]) -> None:
+        """登记派生索引"""
+        for line_no, marker, text, *_ in tasks:
+            self.by_marker.setdefault(marker, set()).add(rel_path)
+            self.ids[self.task_id(rel_path, line_no, text)] = (rel_path, line_no)
+
+    def _task(self, rel_path: str, row: list) -> Task:
+        entry = self.files[rel_path]
+        line_no, marker, text, scheduled, deadline = row
+        return Task(
+            self.task_id(rel_path, line_no, text),
+            rel_path,
+            entry["page"],
+            line_no,
+            marker,
+            text,
+            entry["date"],
+            scheduled,
+            deadline,
+        )
+
+    def tasks(
+        self,
+        markers: Iterable[str] = OPEN_MARKERS,
+        rel_path: Optional[str] = None,
+        due_before: Optional[date] = None,
+    ) -> List[Task]:
+        """查询任务
+
+        Args:
+            markers: 任务标记
+            rel_path: 只查询指定文件
+            due_before: 只查询截止/计划/日志日期不晚于该日期的任务
+
+        Returns:
+            任务列表，有日期的按日期排序，无日期的排在最后
+        """
+        self.ensure_loaded()
+        markers = set(markers)
+        paths: Set[str] = set()
+        for marker in markers:
+            paths |= self.by_marker.get(marker, set())
+        if rel_path is not None:
+            paths &= {rel_path}
+
+        limit = due_before.isoformat() if due_before else None
+        results = []
+        for path in paths:
+            for row in self.files[path]["tasks"]:
+                if row[1] not in markers:
+                    continue
+                task = self._task(path, row)
+                if limit and not (task.due and task.due <= limit):
+                    continue
+                results.append(task)
+
+        results.sort(key=lambda t: (t.due is None, t.due or "", t.page, t.line_no))
+        return results
+
+    def get(self, task_id: str) -> Optional[Task]:
+        """按 ID 获取任务"""
+        self.ensure_loaded()
+        location = self.ids.get(task_id)
+        if not location:
+            return None
+        rel_path, line_no = location
+        for row in self.files[rel_path]["tasks"]:
+            if row[0] == line_no:
+                return self._task(rel_path, row)
+        return None
+
+    def set_marker(self, task: Task, marker: str) -> str:
+        """只改写任务所在的一行，把标记替换为新标记
+
+        Args:
+            task: 任务
+            marker: 新标记，如 DONE
+
+        Returns:
+            改写后的文件内容
+
+        Raises:
+            ValueError: 该行已不是这个任务（文件在生成按钮后被修改）
+        """
+        full_path = self.repo_path / task.rel_path
+        with open(full_path, "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+
+        # 只改写按钮对应的那一行，行内容变化时拒绝，避免标记错误的任务
+        match = None
+        if task.line_no < len(lines):
+            match = _TASK_RE.match(lines[task.line_no])
+        if (
+            not match
+            or match.group("marker") != task.marker
+            or _PLANNING_RE.sub("", match.group("text")).strip() != task.text
+        ):
+            raise ValueError("任务已被修改或移动，请重新发送 /todo")
+
+        line = lines[task.line_no]
+        start, end = match.span("marker")
+        lines[task.line_no] = line[:start] + marker + line[end:]
+        content = "\n".join(lines)
+        with open(full_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return content
+
+
+# 全局任务索引
+task_index = graph_indexes.register(TaskIndexService())
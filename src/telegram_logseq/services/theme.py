@@ -1,21 +1,23 @@
 from typing import List, Tuple, Optional
-from github import Github, Repository, ContentFile
+from github import ContentFile
+from github.Repository import Repository
 from loguru import logger
 
 from ..config.settings import settings
 from ..constants.messages import messages
-from .github import GitHubService
+from .container import services
 
 
 class ThemeService:
     """主题服务类"""
 
     def __init__(self):
-        self.github = Github(settings.GITHUB_TOKEN)
-        self.repo = self.github.get_repo(
-            f"{settings.GITHUB_USER}/{settings.GITHUB_REPO}"
-        )
-        self.github_service = GitHubService()
+        # 共享容器中的 GitHub 客户端，仓库在首次使用时连接
+        self.github_service = services.github
+
+    @property
+    def repo(self) -> Repository:
+        return self.github_service.repo
 
     async def get_all_themes(self) -> List[Tuple[str, ContentFile]]:
         """获取所有可用主题
@@ -0,0 +1,73 @@
+from io import BytesIO
+from typing import Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 为可选依赖
+    Image = None
+    ImageOps = None
+
+# 可以转码的图片扩展名
+TRANSCODABLE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tiff"}
+
+# 输出格式 -> (Pillow 格式名, 扩展名)
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+    "jpg": ("JPEG", ".jpg"),
+}
+
+
+def is_available() -> bool:
+    """Pillow 是否可用"""
+    return Image is not None
+
+
+def transcode_image(
+    content: bytes,
+    max_size: int,
+    output_format: str = "webp",
+    quality: int = 80,
+    thumbnail_size: int = 0,
+) -> Tuple[bytes, str, Optional[bytes]]:
+    """缩放并重新压缩图片，去除 EXIF，可选生成缩略图
+
+    模块级函数，可直接提交到进程池执行。
+
+    Args:
+        content: 原始图片内容
+        max_size: 最长边像素上限，0 表示不缩放
+        output_format: 输出格式 (webp / jpeg)
+        quality: 压缩质量 (1-100)
+        thumbnail_size: 缩略图最长边像素，0 表示不生成
+
+    Returns:
+        (图片内容, 扩展名, 缩略图内容或 None)
+    """
+    pil_format, extension = OUTPUT_FORMATS[output_format.lower()]
+
+    with Image.open(BytesIO(content)) as image:
+        # 按 EXIF 方向旋转后再丢弃 EXIF
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA") or (
+            pil_format == "JPEG" and image.mode == "RGBA"
+        ):
+            image = image.convert("RGB")
+
+        if max_size:
+            image.thumbnail((max_size, max_size))
+        output = _encode(image, pil_format, quality)
+
+        thumbnail = None
+        if thumbnail_size:
+            image.thumbnail((thumbnail_size, thumbnail_size))
+            thumbnail = _encode(image, pil_format, quality)
+
+    return output, extension, thumbnail
+
+
+def _encode(image, pil_format: str, quality: int) -> bytes:
+    """编码图片（不写入 EXIF）"""
+    buffer = BytesIO()
+    image.save(buffer, format=pil_format, quality=quality, optimize=True)
+    return buffer.getvalue()
@@ -0,0 +1,40 @@
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, Hashable
+import asyncio
+
+
+class KeyedLocks:
+    """按键分配的 asyncio 锁
+
+    同一个键的操作互斥（FIFO 顺序），不同键互不影响；
+    没有持有者和等待者的锁会被立即回收，注册表大小只与活跃的键数量相关。
+    """
+
+    def __init__(self):
+        # 键 -> [锁, 持有/等待该锁的协程数]
+        self._locks: Dict[Hashable, list] = {}
+
+    @asynccontextmanager
+    async def lock(self, key: Hashable) -> AsyncIterator[None]:
+        """获取指定键的锁"""
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._locks.pop(key, None)
+
+    def path_lock(self, path: Path):
+        """获取文件路径的锁（按绝对路径归一化）"""
+        return self.lock(str(Path(path).resolve()))
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+# 本地文件写入锁：追加 -> 读取快照 -> 提交入队 需要在同一把锁内完成
+file_locks = KeyedLocks()
@@ -0,0 +1,138 @@
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from functools import wraps
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+import time
+
+# 延迟直方图的桶边界（秒）
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Metrics:
+    """进程内指标注册表，输出 Prometheus 文本格式
+
+    按 (类别, 名称) 记录延迟直方图、调用次数和失败次数，
+    另外支持按需求值的 gauge（如队列深度）。
+    """
+
+    def __init__(self):
+        # (kind, name) -> [各桶计数..., +Inf 计数, 总耗时, 失败次数]
+        self._series: Dict[Tuple[str, str], List[float]] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def observe(self, kind: str, name: str, seconds: float, failed: bool) -> None:
+        """记录一次调用"""
+        series = self._series.get((kind, name))
+        if series is None:
+            series = self._series[(kind, name)] = [0.0] * (len(BUCKETS) + 3)
+        series[bisect_left(BUCKETS, seconds)] += 1
+        series[-2] += seconds
+        if failed:
+            series[-1] += 1
+
+    def gauge(self, name: str, callback: Callable[[], float]) -> None:
+        """注册 gauge，渲染时调用 callback 取值"""
+        self._gauges[name] = callback
+
+    @asynccontextmanager
+    async def track(self, kind: str, name: str) -> AsyncIterator[None]:
+        """统计代码块耗时，抛出异常计为失败"""
+        started = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self.observe(kind, name, time.perf_counter() - started, failed)
+
+    def timed(self, kind: str, name: Optional[str] = None) -> Callable:
+        """异步函数装饰器：统计耗时，抛出异常或返回 False 计为失败"""
+
+        def decorator(func: Callable) -> Callable:
+            label = name or func.__qualname__
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = result is False
+                    return result
+                finally:
+                    self.observe(kind, label, time.perf_counter() - started, failed)
+
+            return wrapper
+
+        return decorator
+
+    def render(self) -> str:
+        """输出 Prometheus 文本格式"""
+        lines = [
+            "# TYPE lupin_operation_seconds histogram",
+        ]
+        for (kind, name), series in sorted(self._series.items()):
+            labels = f'kind="{kind}",name="{name}"'
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), series):
+                cumulative += count
+                lines.append(
+                    f'lupin_operation_seconds_bucket{{{labels},le="{bound}"}} '
+                    f"{cumulative:g}"
+                )
+            lines.append(f"lupin_operation_seconds_sum{{{labels}}} {series[-2]:.6f}")
+            lines.append(f"lupin_operation_seconds_count{{{labels}}} {cumulative:g}")
+
+        lines.append("# TYPE lupin_operation_errors_total counter")
+        for (kind, name), series in sorted(self._series.items()):
+            lines.append(
+                f'lupin_operation_errors_total{{kind="{kind}",name="{name}"}} '
+                f"{series[-1]:g}"
+            )
+
+        for name, callback in sorted(self._gauges.items()):
+            try:
+                value = callback()
+            except Exception as e:
+                logger.debug(f"读取指标 {name} 失败: {e}")
+                continue
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表
+metrics = Metrics()
+
+
+def instrument_handlers(application) -> None:
+    """为应用中所有已注册的处理器加上耗时统计"""
+    from telegram.ext import CallbackQueryHandler, CommandHandler
+
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            if isinstance(handler, CommandHandler):
+                kind = "command"
+            elif isinstance(handler, CallbackQueryHandler):
+                kind = "callback"
+            else:
+                kind = "message"
+            handler.callback = metrics.timed(kind)(handler.callback)
+
+
+async def start_metrics_server(host: str, port: int):
+    """启动独立的 /metrics HTTP 服务（轮询模式使用）"""
+    from aiohttp import web
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"指标服务已启动: http://{host}:{port}/metrics")
+    return runner
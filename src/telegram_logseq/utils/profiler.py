@@ -0,0 +1,118 @@
+from collections import Counter
+from pathlib import Path
+from types import CodeType
+from typing import Coroutine, Dict, Tuple
+from loguru import logger
+import asyncio
+import sys
+import threading
+import time
+
+
+class SamplingProfiler:
+    """进程内采样性能分析器
+
+    后台线程按固定间隔读取所有线程的调用栈（sys._current_frames），
+    汇总为 collapsed stack 格式（"线程;外层;...;内层 次数"），
+    可直接交给 flamegraph.pl 或 speedscope 生成火焰图。
+    不需要重启进程，也不会像 cProfile 那样拖慢每一次函数调用。
+    """
+
+    INTERVAL = 0.01  # 采样间隔（秒）
+    MAX_SECONDS = 300  # 单次最长采样时间
+    MAX_DEPTH = 128  # 单个调用栈最多记录的帧数
+
+    def __init__(self, interval: float = INTERVAL):
+        self.interval = interval
+        self._running = False
+        self._labels: Dict[CodeType, str] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def profile(self, seconds: float) -> Coroutine[None, None, Tuple[str, int]]:
+        """占用采样器并返回采样协程
+
+        占用在调用时同步完成（而不是在协程开始运行时），
+        因此两次几乎同时的调用中第二次一定会失败；返回的协程必须被等待，
+        结束时释放采样器。
+
+        Args:
+            seconds: 采样时长
+
+        Returns:
+            采样协程，结果为 (collapsed stack 文本, 采样次数)
+
+        Raises:
+            RuntimeError: 已有采样正在进行
+        """
+        if self._running:
+            raise RuntimeError("已有性能分析正在进行")
+
+        self._running = True
+        return self._profile(seconds)
+
+    async def _profile(self, seconds: float) -> Tuple[str, int]:
+        """采样指定秒数（调用前已占用采样器）"""
+        try:
+            seconds = max(1.0, min(float(seconds), self.MAX_SECONDS))
+            stacks: Counter = Counter()
+            ticks = [0]
+            stop = threading.Event()
+            thread = threading.Thread(
+                target=self._sample, args=(stop, stacks, ticks), name="profiler"
+            )
+
+            logger.info(f"开始性能采样: {seconds:.0f} 秒")
+            thread.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stop.set()
+                await asyncio.to_thread(thread.join)
+            logger.info(f"性能采样完成: {ticks[0]} 次")
+
+            return self.render(stacks), ticks[0]
+        finally:
+            self._running = False
+
+    def _sample(self, stop: threading.Event, stacks: Counter, ticks: list) -> None:
+        """采样线程主循环"""
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.MAX_DEPTH:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(stack))] += 1
+            ticks[0] += 1
+
+    def _label(self, code: CodeType) -> str:
+        """帧标签（按 code 对象缓存，避免每次采样都格式化字符串）"""
+        label = self._labels.get(code)
+        if label is None:
+            label = (
+                f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+            )
+            label = self._labels[code] = label.replace(";", ":")
+        return label
+
+    @staticmethod
+    def render(stacks: Counter) -> str:
+        """输出 collapsed stack 格式"""
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    @staticmethod
+    def filename() -> str:
+        """生成结果文件名"""
+        return time.strftime("profile-%Y%m%d-%H%M%S.folded")
+
+
+# 全局采样器（同一时间只允许一次采样）
+profiler = SamplingProfiler()
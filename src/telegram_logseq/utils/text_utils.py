@@ -1,7 +1,76 @@
 import re
-from typing import Dict, Optional, List
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, NamedTuple, Optional
+from urllib.parse import unquote
 from ..config.settings import settings
 
+# 预编译的模式（所有消息和页面扫描共用）
+URL_PATTERN = r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+"
+_URL_RE = re.compile(URL_PATTERN)
+# #tag 或 [[tag]]
+_TAG_RE = re.compile(r"#[\w-]+|\[\[([^\]]+)\]\]")
+# key:: value（整段文本按行匹配）
+_PROPERTY_RE = re.compile(r"^[ \t]*([^:\s][^:\n]*?)::[ \t]*(\S[^\n]*)$", re.MULTILINE)
+# 单次扫描的记号：属性只消耗 "key::"，值中的链接和标签继续被扫描；
+# 属性名不含空白、"[" 和 "#"，正文中偶然出现的 "::" 不会吞掉前面的引用
+_TOKEN_PATTERNS = (
+    r"(?P<property>^[ \t]*(?:-[ \t]+)?(?P<key>[^:\s\[#]+)::"
+    r"(?=[ \t]*(?P<value>\S[^\n]*)))",
+    rf"(?P<url>{URL_PATTERN})",
+    r"\[\[(?P<ref>[^\]]+)\]\]",
+    r"#(?P<tag>[\w-]+)",
+)
+
+
+class Token(NamedTuple):
+    """文本记号"""
+
+    kind: str  # property / url / ref / tag / command
+    value: str
+    start: int
+    end: int
+    key: Optional[str] = None  # 属性名（仅 property）
+
+
+def _trie_pattern(words: FrozenSet[str]) -> str:
+    """把一组词构建为前缀树形式的正则（共享前缀只匹配一次，长词优先）"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [
+            re.escape(char) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = f"(?:{'|'.join(branches)})"
+        return f"{group}?" if "" in node else group
+
+    return build(trie)
+
+
+@lru_cache(maxsize=32)
+def _command_re(commands: FrozenSet[str]) -> "re.Pattern[str]":
+    """命令表对应的已编译模式（按命令集合缓存）"""
+    return re.compile(rf"\b{_trie_pattern(commands)}\b")
+
+
+@lru_cache(maxsize=32)
+def _token_re(commands: FrozenSet[str]) -> "re.Pattern[str]":
+    """单次扫描的组合模式（按命令集合缓存）"""
+    patterns = list(_TOKEN_PATTERNS)
+    if commands:
+        patterns.append(rf"(?P<command>\b{_trie_pattern(commands)}\b)")
+    return re.compile("|".join(patterns), re.MULTILINE)
+
 
 class TextUtils:
     """文本处理工具类"""
@@ -22,6 +91,22 @@ class TextUtils:
         title = " ".join(title.split())
         return title
 
+    @staticmethod
+    def page_name_from_filename(filename: str) -> str:
+        """从文件名还原页面名
+
+        Logseq 会把命名空间中的 "/" 编码为 "%2F"（旧格式）或 "___"（新格式）。
+
+        Args:
+            filename: 文件名（可带 .md 扩展名）
+
+        Returns:
+            页面名
+        """
+        if filename.endswith(".md"):
+            filename = filename[:-3]
+        return unquote(filename.replace("___", "/"))
+
     @staticmethod
     def extract_tags(text: str) -> List[str]:
         """提取标签
@@ -33,11 +118,9 @@ class TextUtils:
             标签列表
         """
         # 匹配 #tag 或 [[tag]] 格式
-        pattern = r"#[\w-]+|\[\[([^\]]+)\]\]"
-        matches = re.finditer(pattern, text)
         tags = []
 
-        for match in matches:
+        for match in _TAG_RE.finditer(text):
             tag = match.group(1) if match.group(1) else match.group(0)
             if tag.startswith("#"):
                 tag = tag[1:]  # 移除 #
@@ -56,14 +139,9 @@ class TextUtils:
             元数据字典
         """
         metadata = {}
-        pattern = r"^([^:]+)::(.+)$"
 
-        for line in text.split("\n"):
-            match = re.match(pattern, line.strip())
-            if match:
-                key = match.group(1).strip()
-                value = match.group(2).strip()
-                metadata[key] = value
+        for match in _PROPERTY_RE.finditer(text):
+            metadata[match.group(1).strip()] = match.group(2).strip()
 
         return metadata
 
@@ -99,12 +177,14 @@ class TextUtils:
             替换后的文本
         """
 
+        if not commands_map:
+            return text
+
         def replace(match):
             command = match.group(0)
             return commands_map.get(command, command)
 
-        pattern = "|".join(rf"\b{re.escape(s)}\b" for s in commands_map)
-        return re.sub(pattern, replace, text)
+        return _command_re(frozenset(commands_map)).sub(replace, text)
 
     @staticmethod
     def extract_url(text: str) -> Optional[str]:
@@ -116,6 +196,44 @@ class TextUtils:
         Returns:
             URL 或 None
         """
-        url_pattern = r"http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+"
-        match = re.search(url_pattern, text)
-        return match.group(0) if match else None
+        urls = TextUtils.extract_urls(text)
+        return urls[0] if urls else None
+
+    @staticmethod
+    def extract_urls(text: str) -> List[str]:
+        """提取所有 URL
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            URL 列表
+        """
+        return _URL_RE.findall(text)
+
+    @staticmethod
+    def tokenize(
+        text: str, commands_map: Optional[Dict[str, str]] = None
+    ) -> Iterator[Token]:
+        """单次扫描文本，依次产出属性、URL、[[引用]]、#标签和命令记号
+
+        Args:
+            text: 原始文本（单个块或整个页面）
+            commands_map: 命令映射，提供时同时识别其中的命令
+
+        Returns:
+            记号迭代器（按出现位置排序）
+        """
+        pattern = _token_re(frozenset(commands_map or ()))
+        for match in pattern.finditer(text):
+            kind = match.lastgroup
+            if kind == "property":
+                yield Token(
+                    kind,
+                    match.group("value").strip(),
+                    match.start(),
+                    match.end("value"),
+                    match.group("key").strip(),
+                )
+            else:
+                yield Token(kind, match.group(kind), match.start(), match.end())
@@ -1,11 +1,271 @@
 import re
-import requests
-from typing import Optional
-from bs4 import BeautifulSoup
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+from html.parser import HTMLParser
+from loguru import logger
+import aiohttp
+import asyncio
+import codecs
+import json
+import os
+import time
 import urllib.parse
 
 
-def get_web_page_title(url: str) -> Optional[str]:
+class _TitleParser(HTMLParser):
+    """增量 HTML 解析器，读到 </title>、og:title 或 <body> 即结束"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title_parts: List[str] = []
+        self.og_title: Optional[str] = None
+        self.in_title = False
+        self.done = False
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag == "title" and not self.title_parts:
+            self.in_title = True
+        elif tag == "meta":
+            attrs = dict(attrs)
+            if attrs.get("property") == "og:title" and attrs.get("content"):
+                self.og_title = attrs["content"]
+                self.done = True
+        elif tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "title" and self.in_title:
+            self.in_title = False
+            self.done = True
+
+    def handle_data(self, data: str) -> None:
+        if self.in_title:
+            self.title_parts.append(data)
+
+    def result(self) -> Optional[str]:
+        """解析结果，og:title 优先"""
+        title = self.og_title or " ".join("".join(self.title_parts).split())
+        return title.strip() or None
+
+
+class TitleResolver:
+    """异步网页标题解析器
+
+    复用连接池，强制超时，并把结果保存在按规范化 URL 索引的持久化 LRU/TTL 缓存中。
+    """
+
+    CACHE_FILE = "url_titles.json"
+    # 缓存有效期（秒）
+    TTL = 7 * 24 * 3600
+    # 最大缓存条目数
+    MAX_ENTRIES = 5000
+    # 单个请求的超时（秒）
+    TIMEOUT = 5
+    # 同时请求的 URL 数量
+    MAX_CONCURRENCY = 8
+    # 流式读取的块大小和最多读取的字节数
+    CHUNK_SIZE = 8192
+    MAX_BYTES = 256 * 1024
+    # 只解析这些类型的响应
+    HTML_TYPES = ("text/html", "application/xhtml+xml")
+    # 缓存写盘的合并延迟（秒）
+    SAVE_DELAY = 5
+
+    # 规范化时去除的跟踪参数
+    TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|spm)$")
+
+    def __init__(self):
+        """初始化解析器"""
+        # 规范化 URL -> (标题, 写入时间)
+        self.cache: "OrderedDict[str, list]" = OrderedDict()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loaded = False
+        # 等待写盘的延迟保存任务
+        self._save_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def normalize_url(cls, url: str) -> str:
+        """规范化 URL：小写协议和域名，去掉片段、跟踪参数和末尾斜杠"""
+        parts = urllib.parse.urlsplit(url.strip())
+        query = urllib.parse.urlencode(
+            [
+                (key, value)
+                for key, value in urllib.parse.parse_qsl(
+                    parts.query, keep_blank_values=True
+                )
+                if not cls.TRACKING_PARAMS.match(key)
+            ]
+        )
+        return urllib.parse.urlunsplit(
+            (
+                parts.scheme.lower(),
+                parts.netloc.lower(),
+                parts.path.rstrip("/") or "/",
+                query,
+                "",
+            )
+        )
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取复用连接池的 HTTP 会话"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"User-Agent": "Mozilla/5.0"},
+                timeout=aiohttp.ClientTimeout(total=self.TIMEOUT),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """关闭 HTTP 会话，并立即保存尚未写盘的缓存"""
+        if self._save_task and not self._save_task.done():
+            self._save_task.cancel()
+            await asyncio.to_thread(self._save, list(self.cache.items()))
+        self._save_task = None
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def get_cached(self, url: str) -> Optional[str]:
+        """读取未过期的缓存标题"""
+        self._ensure_loaded()
+        key = self.normalize_url(url)
+        entry = self.cache.get(key)
+        if not entry:
+            return None
+        if time.time() - entry[1] > self.TTL:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return entry[0]
+
+    async def get_title(self, url: str) -> Optional[str]:
+        """获取网页标题（优先使用缓存）
+
+        Args:
+            url: 网页 URL
+
+        Returns:
+            网页标题，获取失败返回 None
+        """
+        titles = await self.get_titles([url])
+        return titles.get(url)
+
+    async def get_titles(self, urls: List[str]) -> Dict[str, str]:
+        """并发获取多个网页的标题
+
+        Args:
+            urls: 网页 URL 列表
+
+        Returns:
+            URL -> 标题，获取失败的 URL 不包含在结果中
+        """
+        titles: Dict[str, str] = {}
+        missing = []
+        for url in dict.fromkeys(urls):
+            cached = self.get_cached(url)
+            if cached:
+                titles[url] = cached
+            else:
+                missing.append(url)
+
+        if not missing:
+            return titles
+
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+
+        async def fetch(url: str) -> Optional[str]:
+            async with semaphore:
+                return await self._fetch_title(url)
+
+        results = await asyncio.gather(*(fetch(url) for url in missing))
+        now = time.time()
+        fetched = False
+        for url, title in zip(missing, results):
+            if title:
+                titles[url] = title
+                self.cache[self.normalize_url(url)] = [title, now]
+                self.cache.move_to_end(self.normalize_url(url))
+                fetched = True
+
+        if fetched:
+            while len(self.cache) > self.MAX_ENTRIES:
+                self.cache.popitem(last=False)
+            self._schedule_save()
+        return titles
+
+    async def _fetch_title(self, url: str) -> Optional[str]:
+        """流式请求网页，增量解析到标题即停止"""
+        try:
+            async with self._get_session().get(url) as response:
+                if response.status != 200:
+                    return None
+                # 图片、PDF 等非 HTML 响应不下载正文
+                if response.content_type not in self.HTML_TYPES:
+                    return None
+
+                decoder = codecs.getincrementaldecoder(
+                    response.charset or "utf-8"
+                )(errors="replace")
+                parser = _TitleParser()
+                received = 0
+
+                async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                    received += len(chunk)
+                    parser.feed(decoder.decode(chunk))
+                    if parser.done or received >= self.MAX_BYTES:
+                        break
+
+                return parser.result()
+        except Exception as e:
+            logger.debug(f"获取网页标题失败 {url}: {e}")
+        return None
+
+    def _ensure_loaded(self) -> None:
+        """首次使用时加载持久化缓存"""
+        if self._loaded:
+            return
+        self._loaded = True
+        cache_path = Path(self.CACHE_FILE)
+        if not cache_path.exists():
+            return
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self.cache = OrderedDict(json.load(f))
+        except Exception as e:
+            logger.error(f"加载网页标题缓存失败: {e}")
+
+    def _schedule_save(self) -> None:
+        """延迟保存缓存，合并短时间内的多次更新"""
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._save_later())
+
+    async def _save_later(self) -> None:
+        """等待合并窗口结束后在线程池中写盘，不阻塞事件循环"""
+        await asyncio.sleep(self.SAVE_DELAY)
+        # 写盘期间的新更新重新调度一次保存
+        self._save_task = None
+        await asyncio.to_thread(self._save, list(self.cache.items()))
+
+    def _save(self, items: List[list]) -> None:
+        """保存缓存（在线程池中执行）
+
+        Args:
+            items: 缓存条目快照
+        """
+        try:
+            tmp_path = Path(f"{self.CACHE_FILE}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False)
+            os.replace(tmp_path, self.CACHE_FILE)
+        except Exception as e:
+            logger.error(f"保存网页标题缓存失败: {e}")
+
+
+# 全局标题解析器
+title_resolver = TitleResolver()
+
+
+async def get_web_page_title(url: str) -> Optional[str]:
     """获取网页标题
 
     Args:
@@ -14,15 +274,124 @@ def get_web_page_title(url: str) -> Optional[str]:
     Returns:
         网页标题，如果获取失败则返回 None
     """
-    try:
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, "html.parser")
-            if title := soup.title:
-                return title.string.strip()
-    except Exception:
-        pass
-    return None
+    return await title_resolver.get_title(url)
+
+
+class TweetEmbedder:
+    """Twitter/X oEmbed 嵌入
+
+    支持 twitter.com / www / mobile 以及 x.com 链接，按推文 ID 持久化缓存嵌入 HTML。
+    """
+
+    CACHE_FILE = "tweet_embeds.json"
+    ENDPOINT = "https://publish.twitter.com/oembed"
+    TIMEOUT = 10
+
+    TWEET_PATTERN = re.compile(
+        r"^(?:https?:)?//(?:(?:www|mobile)\.)?(?:twitter|x)\.com/"
+        r"(?:#!/)?(?:i/web|(?P<user>\w+))/status(?:es)?/(?P<id>\d+)",
+        re.IGNORECASE,
+    )
+    TWITTER_PATTERN = re.compile(
+        r"^(?:https?:)?//(?:(?:www|mobile)\.)?(?:twitter|x)\.com(?:/|$)",
+        re.IGNORECASE,
+    )
+
+    def __init__(self):
+        """初始化嵌入器"""
+        # 推文 ID -> 嵌入 HTML
+        self.cache: Dict[str, str] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loaded = False
+
+    @classmethod
+    def is_twitter_url(cls, url: str) -> bool:
+        """是否是 Twitter/X 链接"""
+        return bool(cls.TWITTER_PATTERN.match(url))
+
+    @classmethod
+    def tweet_id(cls, url: str) -> Optional[str]:
+        """提取推文 ID"""
+        match = cls.TWEET_PATTERN.match(url)
+        return match.group("id") if match else None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取复用连接池的 HTTP 会话"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"User-Agent": "Mozilla/5.0"},
+                timeout=aiohttp.ClientTimeout(total=self.TIMEOUT),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """关闭 HTTP 会话"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def get_html(self, url: str) -> Optional[str]:
+        """获取推文的 oEmbed HTML（优先使用缓存）
+
+        Args:
+            url: 推文链接
+
+        Returns:
+            嵌入 HTML，不是推文链接或获取失败时返回 None
+        """
+        match = self.TWEET_PATTERN.match(url)
+        if not match:
+            return None
+
+        self._ensure_loaded()
+        tweet_id = match.group("id")
+        if tweet_id in self.cache:
+            return self.cache[tweet_id]
+
+        # 统一使用 twitter.com 链接请求 oEmbed
+        user = match.group("user") or "i"
+        canonical = f"https://twitter.com/{user}/status/{tweet_id}"
+        try:
+            async with self._get_session().get(
+                self.ENDPOINT, params={"url": canonical, "omit_script": "false"}
+            ) as response:
+                if response.status != 200:
+                    return None
+                html = (await response.json())["html"]
+        except Exception as e:
+            logger.debug(f"获取推文嵌入失败 {url}: {e}")
+            return None
+
+        self.cache[tweet_id] = html
+        self._save()
+        return html
+
+    def _ensure_loaded(self) -> None:
+        """首次使用时加载持久化缓存"""
+        if self._loaded:
+            return
+        self._loaded = True
+        cache_path = Path(self.CACHE_FILE)
+        if not cache_path.exists():
+            return
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                self.cache = json.load(f)
+        except Exception as e:
+            logger.error(f"加载推文嵌入缓存失败: {e}")
+
+    def _save(self) -> None:
+        """保存缓存"""
+        try:
+            tmp_path = Path(f"{self.CACHE_FILE}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.cache, f, ensure_ascii=False)
+            os.replace(tmp_path, self.CACHE_FILE)
+        except Exception as e:
+            logger.error(f"保存推文嵌入缓存失败: {e}")
+
+
+# 全局推文嵌入器
+tweet_embedder = TweetEmbedder()
 
 
 async def is_twitter_url(url: str) -> bool:
@@ -34,8 +403,7 @@ async def is_twitter_url(url: str) -> bool:
     Returns:
         是否是 Twitter URL
     """
-    pattern = r"((?:https?:)?//)?(?:www.)?twitter.com/(?:(?:\w)*#!/)?(?:pages/)?(?:[\w-]*/)*(?:[\w-]*)"
-    return bool(re.match(pattern, url))
+    return TweetEmbedder.is_twitter_url(url)
 
 
 async def generate_twitter_iframe(url: str) -> Optional[str]:
@@ -47,15 +415,8 @@ async def generate_twitter_iframe(url: str) -> Optional[str]:
     Returns:
         嵌入代码，如果生成失败则返回 None
     """
-    try:
-        endpoint = "https://publish.twitter.com/oembed?url="
-        response = requests.get(endpoint + url, headers={"User-Agent": "Mozilla/5.0"})
-
-        if response.status_code == 200:
-            data = response.json()
-            src_code = urllib.parse.quote(data["html"])
-            return f'<iframe style="border:none;" width="550" height="400" data-tweet-url="{url}" src="data:text/html;charset=utf-8,{src_code}"></iframe>'
-
-    except Exception:
-        pass
-    return None
+    html = await tweet_embedder.get_html(url)
+    if not html:
+        return None
+    src_code = urllib.parse.quote(html)
+    return f'<iframe style="border:none;" width="550" height="400" data-tweet-url="{url}" src="data:text/html;charset=utf-8,{src_code}"></iframe>'
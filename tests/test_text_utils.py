@@ -0,0 +1,25 @@
+from telegram_logseq.utils.text_utils import TextUtils
+
+
+def _tokens(text):
+    return [(token.kind, token.value, token.key) for token in TextUtils.tokenize(text)]
+
+
+def test_tokenize_keeps_refs_before_inline_double_colon():
+    """正文中的 "::" 不是属性，前面的 [[引用]] 仍被识别"""
+    assert _tokens("- read [[Foo]] notes:: x") == [("ref", "Foo", None)]
+
+
+def test_tokenize_block_property():
+    """块属性去掉列表符号，值中的引用继续被扫描"""
+    assert _tokens("- type:: [[Person]]") == [
+        ("property", "[[Person]]", "type"),
+        ("ref", "Person", None),
+    ]
+
+
+def test_tokenize_page_property():
+    assert _tokens("alias:: Robert\n#tag") == [
+        ("property", "Robert", "alias"),
+        ("tag", "tag", None),
+    ]